@@ -1,24 +1,32 @@
 import os
+import json
+import tempfile
+import threading
+import numpy as np
 import pandas as pd
 import statistics
 import base64
 import sys
 import joblib
 import sklearn
-import joblib
 import streamlit as st
-import matplotlib.pyplot as plt
 from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.pipeline import Pipeline
-from scipy.stats.mstats import winsorize
-
-# --- Direktori ---
-import os
-
-folder_path = r"C:\Users\muham\Documents\BISMILLAHIRRAHMANIRRAHIM_SKRIPSI\Muhammad Khatami_202131060\Deploy"
-
-# List everything inside the folder
-print("Contents of the folder:", os.listdir(folder_path))
+from banding import add_bands, kategori_p, kategori_k
+from outliers import winsorize_bounds, clip_columns
+from evaluation import ClusterStats
+from aggregates import CategoryCounts, render_category_chart
+from ingest import STREAMING_THRESHOLD_BYTES, process_upload_streaming
+from columnar import score_columnar
+from storage import open_default_store
+from writer import KpiWriter
+from schema import apply_schema, memory_report
+from search import NameSearchIndex
+from pagination import paginated_table
+from profiling import profiler, stage
+from dedup import FingerprintStore, UploadDeduplicator
+from registry import ModelRegistry
+from service import ScoringService
 
 # --- Kelas untuk Preprocessing ---
 class MissingValueHandler(BaseEstimator, TransformerMixin):
@@ -53,69 +61,112 @@ class NumerisasiHandler(BaseEstimator, TransformerMixin):
         return X
 
 class OutlierHandlerWinsorize(BaseEstimator, TransformerMixin):
-    """Menangani outlier menggunakan metode Winsorize."""
+    """
+    Menangani outlier menggunakan metode Winsorize.
+    Batas setiap kolom numerik dipelajari saat `fit` dan disimpan di pipeline, lalu
+    `transform` memotong seluruh kolom numerik dengan satu `np.clip`.
+    """
     def __init__(self, limits=(0.01, 0.01)):
         self.limits = limits
 
     def fit(self, X, y=None):
+        self.columns_ = list(X.select_dtypes(include=[float, int]).columns)
+        self.lower_, self.upper_ = winsorize_bounds(X[self.columns_].to_numpy(dtype=float), self.limits)
         return self
 
     def transform(self, X):
         X = X.copy()
-        numeric_columns = X.select_dtypes(include=[float, int]).columns
-        for col in numeric_columns:
-            X[col] = winsorize(X[col], limits=self.limits)
-        return X
+        if hasattr(self, "columns_"):
+            # Hanya kolom yang dilihat saat fit yang dipotong
+            positions = [i for i, col in enumerate(self.columns_) if col in X.columns]
+            columns = [self.columns_[i] for i in positions]
+            lower, upper = self.lower_[positions], self.upper_[positions]
+        else:
+            # Pipeline lama tanpa batas hasil fit: batas dihitung dari batch ini (sama dengan scipy winsorize)
+            columns = list(X.select_dtypes(include=[float, int]).columns)
+            lower, upper = winsorize_bounds(X[columns].to_numpy(dtype=float), self.limits)
+        return clip_columns(X, columns, lower, upper)
+
+# --- Tabel Kategori Nilai Kinerja ---
+# Mapping kategori sesuai dengan hasil interval cluster (memastikan semua kombinasi terdefinisi)
+CATEGORY_MAPPING = {
+    # Sangat Istimewa (Paling Baik)
+    (1, 1): "Sangat Istimewa",
+    (2, 1): "Sangat Istimewa",
+
+    # Istimewa
+    (1, 2): "Istimewa",
+    (2, 2): "Istimewa",
+    (1, 3): "Istimewa",
+    (1, 4): "Istimewa",
+
+    # Baik Sekali
+    (2, 3): "Baik Sekali",
+    (2, 4): "Baik Sekali",
+
+    # Baik
+    (3, 1): "Baik",
+    (3, 2): "Baik",
+    (3, 3): "Baik",
+    (3, 4): "Baik",
+    (4, 1): "Baik",
+    (4, 2): "Baik",
+
+    # Sedang
+    (4, 3): "Sedang",
+    (4, 4): "Sedang",
+    (5, 2): "Sedang",
+    (5, 3): "Sedang",
+
+    # Kurang
+    (5, 4): "Kurang"
+}
+
+CATEGORY_LABELS = ["Sangat Istimewa", "Istimewa", "Baik Sekali", "Baik", "Sedang", "Kurang"]
+DEFAULT_CATEGORY = "Kurang"  # Kombinasi yang tidak ada dalam mapping
+
+
+def build_category_table(category_mapping=CATEGORY_MAPPING, labels=CATEGORY_LABELS,
+                         default=DEFAULT_CATEGORY, n_p=5, n_k=4):
+    """Menyusun tabel kode kategori berukuran (P_num x K_num) dari mapping kategori."""
+    table = np.full((n_p, n_k), labels.index(default), dtype=np.int8)
+    for (p_num, k_num), kategori in category_mapping.items():
+        table[p_num - 1, k_num - 1] = labels.index(kategori)
+    return table
+
+
+# Tabel dihitung sekali saat modul dimuat, bukan pada setiap pemanggilan transform
+CATEGORY_TABLE = build_category_table()
+
+
+def assign_category(p_num, k_num, table=CATEGORY_TABLE, labels=CATEGORY_LABELS, default=DEFAULT_CATEGORY):
+    """
+    Menentukan kategori Nilai Kinerja untuk seluruh batch sekaligus.
+    Nilai P_num/K_num di luar tabel (NaN, pecahan, atau di luar rentang) mendapat kategori default.
+    """
+    p = pd.to_numeric(pd.Series(p_num), errors="coerce").to_numpy(dtype=float)
+    k = pd.to_numeric(pd.Series(k_num), errors="coerce").to_numpy(dtype=float)
+    n_p, n_k = table.shape
+
+    valid = (
+        (p == np.round(p)) & (k == np.round(k))
+        & (p >= 1) & (p <= n_p) & (k >= 1) & (k <= n_k)
+    )
+    codes = np.full(p.shape, labels.index(default), dtype=np.int8)
+    codes[valid] = table[p[valid].astype(np.intp) - 1, k[valid].astype(np.intp) - 1]
+    return pd.Categorical.from_codes(codes, categories=labels)
+
 
 class AssignCategoryTransformer(BaseEstimator, TransformerMixin):
+    """Menentukan kategori Nilai Kinerja berdasarkan kombinasi P_num dan K_num."""
     def fit(self, X, y=None):
         return self
 
     def transform(self, X):
         X = X.copy()
 
-        # Mapping kategori sesuai dengan hasil interval cluster (memastikan semua kombinasi terdefinisi)
-        category_mapping = {
-            # Sangat Istimewa (Paling Baik)
-            (1, 1): "Sangat Istimewa",
-            (2, 1): "Sangat Istimewa",
-
-            # Istimewa
-            (1, 2): "Istimewa",
-            (2, 2): "Istimewa",
-            (1, 3): "Istimewa",
-            (1, 4): "Istimewa",
-
-            # Baik Sekali
-            (2, 3): "Baik Sekali",
-            (2, 4): "Baik Sekali",
-
-            # Baik
-            (3, 1): "Baik",
-            (3, 2): "Baik",
-            (3, 3): "Baik",
-            (3, 4): "Baik",
-            (4, 1): "Baik",
-            (4, 2): "Baik",
-            (4, 3): "Baik",
-
-            # Sedang
-            (4, 4): "Sedang",
-            (4, 3): "Sedang",
-            (5, 2): "Sedang",
-            (5, 3): "Sedang",
-            # Kurang
-
-
-            (5, 4): "Kurang"
-        }
-
-        # Pastikan semua kombinasi dalam rentang 1-5 (P_num) dan 1-4 (K_num) mendapatkan kategori
-        def assign_category(p_num, k_num):
-            return category_mapping.get((p_num, k_num), "Kurang")  # Default ke "Kurang" jika tidak ada dalam mapping
-
-        # Terapkan kategori ke setiap baris
-        X['Nilai Kinerja'] = X.apply(lambda row: assign_category(row['P_num'], row['K_num']), axis=1)
+        # Terapkan kategori ke seluruh baris dalam satu operasi array
+        X['Nilai Kinerja'] = assign_category(X['P_num'].to_numpy(), X['K_num'].to_numpy())
 
         return X
 
@@ -125,82 +176,139 @@ pipeline_clustering = Pipeline([
 ])
 
 # --- Fungsi untuk Memuat Data dan Model ---
-@st.cache_data
-def load_data():
+@st.cache_resource
+def load_writer():
+    """
+    Penulis tunggal data KPI yang dibagi ke semua sesi: data baru dicatat ke WAL (O(1) per pengiriman)
+    dan ditulis berkelompok ke penyimpanan utama (SQLite) oleh thread latar belakang.
+    File Excel lama dimigrasikan otomatis saat pertama kali dijalankan.
     """
-    Memuat dataset dan model yang telah dilatih:
+    return KpiWriter(open_default_store())
+
+kpi_writer = load_writer()
+
+@st.cache_resource
+def load_data_lock():
+    """
+    Kunci bersama untuk semua sesi: pengiriman data baru, snapshot, dan penambahan ke indeks
+    pencarian dilakukan di bawah kunci yang sama, sehingga urutan baris indeks selalu sama
+    dengan urutan baris snapshot (hasil pencarian berupa posisi baris untuk `data.iloc`).
+    """
+    return threading.Lock()
+
+data_lock = load_data_lock()
+
+# Memuat data (snapshot konsisten: penyimpanan + data baru yang sudah dikonfirmasi)
+with data_lock:
+    data = kpi_writer.snapshot()
+
+@st.cache_resource
+def load_registry():
+    """
+    Registry artefak model, dibagi ke semua sesi dalam satu proses:
     - `preprocessing_pipeline`: Pipeline untuk preprocessing data.
     - `kmeans_model`: Model K-Means untuk pengelompokan.
     - `clustering_pipeline`: Pipeline untuk post-processing (penentuan kategori).
+    Setiap artefak baru dimuat (unpickle) ketika pertama kali dibutuhkan.
     """
-    data = pd.read_excel("Data_Kpi_Hasil_Clustered_Kmeans.xlsx")
-    
-    # Pastikan class sudah didefinisikan sebelum joblib.load()
-    global AssignClusterTransformer
-
-    preprocessing_pipeline = joblib.load("preprocessing_pipeline.pkl")  # Pipeline preprocessing
-    kmeans_model = joblib.load("kmeans_model.pkl")  # Model K-Means
-    clustering_pipeline = joblib.load("clustering_pipeline.pkl", globals())  # Pipeline post-processing
-
-    return data, preprocessing_pipeline, kmeans_model, clustering_pipeline
-
-# Memuat data dan model
-data, preprocessing_pipeline, kmeans_model, clustering_pipeline = load_data()
-
-
-# --- Numerisasi Nilai P dan K ---
-def numerisasi_p_raw(nilai_p):
-    """Mengubah nilai P menjadi kategori numerik."""
-    if nilai_p >= 101:
-        return 1  # P1
-    elif 91 <= nilai_p <= 100:
-        return 2  # P2
-    elif 81 <= nilai_p <= 90:
-        return 3  # P3
-    elif 71 <= nilai_p <= 80:
-        return 4  # P4
-    elif nilai_p <= 70:
-        return 5  # P5
-    else:
-        return 0  # Nilai tidak valid
+    return ModelRegistry(".")
 
+registry = load_registry()
+
+# Model ringan (centroid, tabel klaster per sel P_num x K_num, tabel kategori) dari model_light.npz,
+# sehingga aplikasi dapat mulai tanpa unpickle objek sklearn/scipy
+cluster_predictor = registry.lightweight(CATEGORY_TABLE, CATEGORY_LABELS, DEFAULT_CATEGORY)
+
+
+# --- Layanan Penilaian ---
+@st.cache_resource
+def load_scoring_service():
+    """
+    Layanan penilaian micro-batching yang dibagi ke semua sesi: data dari banyak pengguna
+    digabung menjadi satu batch dan dinilai dengan satu panggilan model ringan.
+    """
+    return ScoringService(cluster_predictor)
 
-def numerisasi_k_raw(nilai_k):
-    """Mengubah nilai K menjadi kategori numerik."""
-    return nilai_k if nilai_k in [1, 2, 3, 4] else 0
+scoring_service = load_scoring_service()
 
 
 # --- Fungsi untuk Memproses Data Baru ---
 def process_new_data(new_data_dict):
     """
-    Memproses data baru menggunakan pipeline dan model:
-    - Preprocessing data melalui `preprocessing_pipeline`.
-    - Prediksi cluster menggunakan model K-Means.
-    - Post-processing hasil prediksi untuk menentukan kategori.
+    Memproses satu data baru melalui layanan penilaian:
+    - Prediksi cluster dari tabel klaster P_num x K_num.
+    - Penentuan kategori Nilai Kinerja dari tabel kategori.
+    Preprocessing pipeline memotong masukan ke batas winsorize hasil fit (misalnya Nilai P 68-101,
+    Nilai K 1-4). Batas P_num (1-5) dan K_num (1-4) mencakup seluruh grid, sehingga Cluster dan
+    Nilai Kinerja yang dihitung dari P_num/K_num tidak berubah dan pipeline tidak perlu dimuat;
+    Nilai P dan Nilai K disimpan apa adanya (tidak dipotong).
     """
-    # Konversi data input ke DataFrame
-    new_data = pd.DataFrame([new_data_dict])
-    
-    # Preprocessing data
-    new_data_preprocessed = preprocessing_pipeline.transform(new_data)
-    
-    # Prediksi cluster menggunakan K-Means
-    new_data_preprocessed['Cluster'] = kmeans_model.predict(new_data_preprocessed[['P_num', 'K_num']])
-    
-    # Post-processing untuk menghasilkan kategori akhir
-    final_data = clustering_pipeline.transform(new_data_preprocessed)
-    return final_data
+    return pd.DataFrame([scoring_service.score(new_data_dict, timeout=30)])
 
-# --- Fungsi untuk Memuat Data dan Model ---
-@st.cache_data
-def load_models():
-    preprocessing_pipeline = joblib.load("preprocessing_pipeline.pkl")
-    kmeans_model = joblib.load("kmeans_model.pkl")
-    clustering_pipeline = joblib.load("clustering_pipeline.pkl")
-    return preprocessing_pipeline, kmeans_model, clustering_pipeline
+# --- Statistik Kualitas Klaster ---
+@st.cache_resource
+def load_cluster_stats():
+    """
+    Statistik klaster (jumlah, jumlah koordinat, jumlah kuadrat) untuk seluruh data KPI.
+    Dihitung sekali, lalu diperbarui secara inkremental setiap kali data baru ditambahkan.
+    """
+    return ClusterStats.from_data(data[['P_num', 'K_num']], data['Cluster'], n_clusters=cluster_predictor.n_clusters)
+
+cluster_stats = load_cluster_stats()
+
+# --- Indeks Pencarian Nama ---
+@st.cache_resource
+def load_search_index():
+    """
+    Indeks trigram untuk `Nama Pegawai` dan `Bagian/Fakultas`.
+    Dibangun sekali, lalu diperbarui secara inkremental setiap kali data baru ditambahkan.
+    """
+    return NameSearchIndex.from_frame(data.frame())
+
+with data_lock:
+    search_index = load_search_index()
+    if search_index.n_rows < len(data):
+        # Indeks tertinggal dari data (misalnya dibangun dari snapshot lama): bangun ulang indeks.
+        # Indeks boleh lebih panjang dari `data` sesi ini: baris baru selalu ditambahkan di akhir.
+        load_search_index.clear()
+        search_index = load_search_index()
+
+@st.cache_resource
+def load_category_counts(_data):
+    """
+    Jumlah data per kategori `Nilai Kinerja` untuk menu Visualisasi Data.
+    Dihitung sekali, lalu diperbarui secara inkremental setiap kali data baru ditambahkan.
+    """
+    return CategoryCounts.from_frame(_data.frame())
+
+with data_lock:
+    # Agregat dibandingkan dengan snapshot terbaru (bukan `data` sesi ini yang mungkin sudah tertinggal),
+    # di bawah kunci yang sama dengan pengiriman, sehingga tidak ada baris yang terlewat atau terhitung dua kali
+    current_data = kpi_writer.snapshot()
+    category_counts = load_category_counts(current_data)
+    if category_counts.n_rows != len(current_data):
+        load_category_counts.clear()
+        category_counts = load_category_counts(current_data)
+
+@st.cache_data(max_entries=8)
+def category_chart_png(key, _counts):
+    """Grafik distribusi kategori (PNG), digambar ulang hanya jika versi agregat berubah."""
+    return render_category_chart(_counts.series(), _counts.percentages())
+
+@st.cache_data(max_entries=1)
+def kpi_csv(version, columns):
+    """CSV data KPI untuk diunduh; dibuat sekali per versi data yang diminta lalu dipakai ulang oleh semua rerun."""
+    return kpi_writer.snapshot()[list(columns)].to_csv(index=False)
+
+@st.cache_resource
+def load_fingerprint_store():
+    """
+    Himpunan sidik jari 64-bit (NIP + periode + nilai) dari semua unggahan sebelumnya,
+    untuk mendeteksi data yang diunggah ulang tanpa memuat riwayat data.
+    """
+    return FingerprintStore()
 
-# Memuat model yang sudah ada
-preprocessing_pipeline, kmeans_model, clustering_pipeline = load_models()
+fingerprint_store = load_fingerprint_store()
 
 #====================== Fitur Baru =========================
 def process_uploaded_data(uploaded_file):
@@ -219,33 +327,17 @@ def process_uploaded_data(uploaded_file):
         st.error("File harus memiliki kolom: 'Nama Pegawai', 'Bagian/Fakultas', 'Nilai P', dan 'Nilai K'")
         return None
     
-    # Menambahkan kolom numerik untuk P dan K
-    def numerisasi_p(nilai_p):
-        if nilai_p >= 101:
-            return 1
-        elif 91 <= nilai_p <= 100:
-            return 2
-        elif 81 <= nilai_p <= 90:
-            return 3
-        elif 71 <= nilai_p <= 80:
-            return 4
-        else:
-            return 5
-
-    def numerisasi_k(nilai_k):
-        return nilai_k if nilai_k in [1, 2, 3, 4] else 0
-    
-    df["P_num"] = df["Nilai P"].apply(numerisasi_p)
-    df["K_num"] = df["Nilai K"].apply(numerisasi_k)
+    # Menambahkan kolom kategori dan numerik untuk P dan K
+    df = add_bands(df)
     
     # Preprocessing
-    df_preprocessed = preprocessing_pipeline.transform(df)
+    df_preprocessed = registry.preprocessing_pipeline.transform(df)
     
     # Prediksi cluster
-    df_preprocessed['Cluster'] = kmeans_model.predict(df_preprocessed[['P_num', 'K_num']])
+    df_preprocessed['Cluster'] = cluster_predictor.predict_cells(df_preprocessed['P_num'], df_preprocessed['K_num'])
     
     # Post-processing kategori
-    final_data = clustering_pipeline.transform(df_preprocessed)
+    final_data = registry.clustering_pipeline.transform(df_preprocessed)
     return final_data
 
 # --- Antarmuka Streamlit ---
@@ -278,6 +370,30 @@ st.sidebar.header("Menu")
 
 menu = st.sidebar.selectbox("Pilih Menu", ["Beranda", "Cari Pegawai", "Input Data Baru", "Visualisasi Data","Clustering"])  # Perbaikan pada typo 'Bearanda'
 
+# Profiling per tahap (aktif dengan SIKERJA_PROFILE=1): satu eksekusi per rerun
+profiler.start_run(menu)
+if profiler.enabled:
+    st.sidebar.warning(
+        "Profiling aktif: hanya untuk satu pengguna. Tahap dari semua sesi dijalankan bergantian, "
+        "sehingga aplikasi melambat jika dipakai bersamaan."
+    )
+
+# Informasi versi artefak model (ukuran, hash, status pemuatan)
+with st.sidebar.expander("Info Model"):
+    st.dataframe(pd.DataFrame(registry.metadata()), hide_index=True)
+
+@st.cache_data(max_entries=1)
+def data_memory_report(base_version, _data):
+    """
+    Pemakaian memori data KPI sebelum dan sesudah skema tipe ringkas. Dihitung dari frame dasar
+    snapshot, sekali setiap kali pengiriman baru digabung (bukan pada setiap pengiriman).
+    """
+    return memory_report(_data)
+
+# Pemakaian memori data KPI per kolom
+with st.sidebar.expander("Memori Data"):
+    st.dataframe(data_memory_report(data.base_version, data.base), hide_index=True)
+
 # Fungsi untuk menambahkan deskripsi saja
 def add_description():
     title = """
@@ -312,16 +428,21 @@ if menu == "Beranda":  # Harus cocok dengan pilihan di selectbox
 # --- Menu 2: Cari Pegawai ---
 elif menu == "Cari Pegawai":
     st.header("Pencarian Data Pegawai Berdasarkan Nama")
-    nama_pegawai = st.text_input("Masukkan Nama Pegawai",placeholder="Masukkan nama pegawai yang ingin Anda cari")
+    nama_pegawai = st.text_input("Masukkan Nama Pegawai",placeholder="Masukkan nama pegawai atau bagian/fakultas yang ingin Anda cari")
+    batas_hasil = st.number_input("Jumlah hasil maksimal", min_value=1, max_value=500, value=50, step=10)
 
     if nama_pegawai:
-        filtered_data = data[data['Nama Pegawai'].str.contains(nama_pegawai, case=False, na=False)]
+        # Pencarian substring dan fuzzy pada indeks, diurutkan dari hasil paling relevan
+        posisi = search_index.search(nama_pegawai, limit=int(batas_hasil))
+        # Baris yang ditambahkan sesi lain setelah snapshot sesi ini belum ada di `data`
+        filtered_data = data.iloc[posisi[posisi < len(data)]]
         if not filtered_data.empty:
             st.write(f"Hasil Pencarian untuk '{nama_pegawai}':")
-            st.table(filtered_data[[
+            # Hanya halaman yang terlihat yang dikirim ke browser (urutan awal = relevansi)
+            paginated_table(filtered_data[[
                 "Nama Pegawai", "Bagian/Fakultas", "Nilai P", "P", "P_num", 
                 "Nilai K", "K", "K_num", "Cluster", "Nilai Kinerja"
-            ]])
+            ]], key="cari")
         else:
             st.warning("Nama pegawai tidak ditemukan.")
 
@@ -386,30 +507,6 @@ elif menu == "Input Data Baru":
     nilai_k_calculated = hitung_nilai_k(nilai_penilai)
 
     # Kategori untuk mendaapatkan P and K
-    def kategori_p(nilai_p):
-        if nilai_p >= 101:
-            return "P1", 1
-        elif 91 <= nilai_p <= 100:
-            return "P2", 2
-        elif 81 <= nilai_p <= 90:
-            return "P3", 3
-        elif 71 <= nilai_p <= 80:
-            return "P4", 4
-        else:
-            return "P5", 5
-
-    def kategori_k(nilai_k):
-        if 1 <= nilai_k < 2:
-            return "K1", 1
-        elif 2 <= nilai_k < 3:
-            return "K2", 2
-        elif 3 <= nilai_k < 4:
-            return "K3", 3
-        elif 4 <= nilai_k <= 5:
-            return "K4", 4
-        else:
-            return "Tidak termasuk kategori", None
-
     kategori_p_value, p_numerisasi = kategori_p(nilai_p_calculated)
     kategori_k_value, k_numerisasi = kategori_k(nilai_k_calculated)
 
@@ -457,33 +554,43 @@ elif menu == "Input Data Baru":
             st.error("Nama Pegawai dan Bagian/Fakultas harus diisi.")
         else:
             # Persiapkan data baru untuk proses integrasi
+            kategori_p_input, p_num_input = kategori_p(nilai_p)
+            kategori_k_input, k_num_input = kategori_k(nilai_k)
             new_data = {
                 "Nama Pegawai": nama_pegawai,
                 "Bagian/Fakultas": bagian_fakultas,
                 "Nilai P": nilai_p,
-                "P": f"P{numerisasi_p_raw(nilai_p)}",
-                "P_num": numerisasi_p_raw(nilai_p),
+                "P": kategori_p_input,
+                "P_num": p_num_input,
                 "Nilai K": nilai_k,
-                "K": f"K{numerisasi_k_raw(nilai_k)}",
-                "K_num": numerisasi_k_raw(nilai_k),
+                "K": kategori_k_input,
+                "K_num": k_num_input,
             }
 
             try:
                 # Proses hasil prediksi menggunakan pipeline atau model
-                result = process_new_data(new_data)
+                with stage("penilaian", rows_in=1):
+                    result = process_new_data(new_data)
                 new_data["Cluster"] = result['Cluster'].iloc[0]
                 new_data["Nilai Kinerja"] = result['Nilai Kinerja'].iloc[0]
 
-                # Tambahkan data ke dataset dan simpan
-                updated_data = pd.concat([data, pd.DataFrame([new_data])], ignore_index=True)
-                updated_data.to_excel("Data_Kpi_Hasil_Clustered_Kmeans.xlsx", index=False)
+                # Tambahkan data ke WAL penulis tunggal (aman untuk pengiriman bersamaan dari banyak sesi);
+                # penyimpanan utama diperbarui berkelompok di latar belakang
+                # Pengiriman, snapshot, dan indeks pencarian diperbarui di bawah satu kunci agar urutan barisnya sama
+                with stage("simpan_wal", rows_in=1), data_lock:
+                    kpi_writer.submit(new_data)
+                    data = kpi_writer.snapshot()
+                    search_index.add([new_data])
+                    category_counts.update([new_data])
 
-                # Perbarui variabel data
-                data = pd.read_excel("Data_Kpi_Hasil_Clustered_Kmeans.xlsx")
+                    # Perbarui statistik klaster tanpa menghitung ulang seluruh data
+                    cluster_stats.update([[new_data["P_num"], new_data["K_num"]]], [new_data["Cluster"]])
 
                 # Tampilkan hasil sukses
                 st.success("Data telah berhasil diproses dan disimpan.")
                 st.table(pd.DataFrame([new_data]))
+                st.write(f"📐 **Davies-Bouldin Index (DBI) seluruh data:** {cluster_stats.davies_bouldin():.4f}")
+                st.write(f"📐 **Silhouette seluruh data:** {cluster_stats.silhouette():.4f}")
 
                 # Penjelasan tambahan hasil
                 st.markdown("### **Penjelasan Hasil Penilaian**")
@@ -575,30 +682,9 @@ elif menu == "Visualisasi Data":
 
     # --- Visualisasi Presentasi Kategori ---
     if "Nilai Kinerja" in data.columns:
-        # Hitung jumlah data untuk setiap kategori
-        kategori_counts = data['Nilai Kinerja'].value_counts()
-        kategori_persen = data['Nilai Kinerja'].value_counts(normalize=True) * 100
-        total_data = data['Nilai Kinerja'].count()
-
-        # Membuat bar chart
-        fig, ax = plt.subplots(figsize=(10, 6))  # Ukuran figure diperbesar untuk tampilan lebih jelas
-        bars = ax.bar(kategori_counts.index, kategori_counts.values)
-
-        # Menambahkan label jumlah data di atas setiap bar
-        for bar, count, percent in zip(bars, kategori_counts.values, kategori_persen):
-            ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 2, 
-                    f"{count} ({percent:.1f}%)", ha='center', fontsize=12, fontweight="bold")
-
-        # Menyesuaikan tampilan
-        ax.set_xlabel("Kategori Nilai Kinerja", fontsize=14)
-        ax.set_ylabel("Jumlah Pegawai", fontsize=14)
-        ax.set_title("Distribusi Kinerja Pegawai Berdasarkan Kategori", fontsize=16, fontweight="bold")
-        ax.set_xticks(range(len(kategori_counts.index)))
-        ax.set_xticklabels(kategori_counts.index, rotation=45, ha='right')
-        ax.grid(axis='y', linestyle='--', alpha=0.7)  # Menambahkan grid horizontal
-
-        # Menampilkan grafik di Streamlit
-        st.pyplot(fig)
+        # Jumlah dan persentase per kategori diambil dari agregat inkremental;
+        # grafik hanya digambar ulang jika versi agregat berubah
+        st.image(category_chart_png(category_counts.key(), category_counts))
 
     else:
         st.warning("Kolom 'Nilai Kinerja' tidak ditemukan dalam dataset.")
@@ -606,7 +692,7 @@ elif menu == "Visualisasi Data":
     # Menampilkan dataset (pastikan variabel data sudah didefinisikan sebelumnya)
     try:
         st.header("Dataset KPI")
-        st.dataframe(data)
+        paginated_table(data, key="visualisasi")
     except NameError:
         st.error("Dataset tidak ditemukan. Pastikan variabel 'data' sudah didefinisikan.")
 
@@ -615,16 +701,18 @@ elif menu == "Visualisasi Data":
     st.markdown("### Unduh Dataset KPI FINAL ")
 
     
-    selected_columns = ["Nama Pegawai", "Bagian/Fakultas", "Nilai P", "P_num", "Nilai K", "K", "Nilai Kinerja"]
-    filtered_data = data[selected_columns]
-
-    # Tombol untuk mengunduh file CSV dengan kolom yang dipilih
-    st.download_button(
-        label="Download Data KPI",
-        data=filtered_data.to_csv(index=False),
-        file_name="Data KPI.csv",
-        mime="text/csv"
-    )
+    selected_columns = ("Nama Pegawai", "Bagian/Fakultas", "Nilai P", "P_num", "Nilai K", "K", "Nilai Kinerja")
+
+    # CSV baru dibuat saat pengguna memintanya (di-cache per versi data), bukan pada setiap rerun
+    if st.button("Siapkan CSV", key="siapkan_kpi_csv"):
+        st.session_state["kpi_csv_version"] = kpi_writer.version
+    if "kpi_csv_version" in st.session_state:
+        st.download_button(
+            label="Download Data KPI",
+            data=kpi_csv(st.session_state["kpi_csv_version"], selected_columns),
+            file_name="Data KPI.csv",
+            mime="text/csv"
+        )
 #======================= Fitur Baru =======================================#
 
 # Fungsi untuk memproses file yang diunggah
@@ -653,17 +741,11 @@ def process_uploaded_data(uploaded_file):
     else:
         return None, None, None, None, None  # Jika kolom tidak ada, hentikan eksekusi
 
-    # Hapus data yang memiliki nilai NaN
-    df_cleaned = df.dropna()
-
-    # Simpan data yang dihapus
-    data_dihapus = df[df.isnull().any(axis=1)]
-
-    # Hitung jumlah data setelah preprocessing
-    total_data_setelah = df_cleaned.shape[0]
+    # Hitung data tanpa nilai NaN (baris kosong dibuang saat preprocessing, tanpa menyalin df)
+    total_data_setelah = int(df.notna().all(axis=1).sum())
     total_data_dihapus = total_data_awal - total_data_setelah
 
-    return df_cleaned, df_nip, total_data_awal, total_data_setelah, total_data_dihapus
+    return df, df_nip, total_data_awal, total_data_setelah, total_data_dihapus
 
 # Menu Clustering
 if menu == "Clustering":
@@ -683,9 +765,81 @@ if menu == "Clustering":
     # Unggah file di Streamlit
     uploaded_file = st.file_uploader("Unggah file CSV atau Excel", type=["csv", "xlsx"])
 
-    if uploaded_file:
+    # Deduplikasi antarunggahan (NIP + periode + Nilai P + Nilai K)
+    cek_duplikat = st.checkbox("Lewati data yang sudah pernah diunggah", value=True)
+    periode = st.text_input("Periode penilaian (opsional, dipakai jika file tidak memiliki kolom 'Periode')").strip()
+
+    def make_deduplicator():
+        if not cek_duplikat:
+            return None
+        # Sidik jari yang sudah disimpan oleh file yang sama pada eksekusi ulang skrip sebelumnya
+        key = ("dedup", uploaded_file.file_id, periode)
+        return UploadDeduplicator(fingerprint_store, periode, st.session_state.get(key))
+
+    def commit_deduplicator(deduplicator):
+        if deduplicator is None:
+            return
+        deduplicator.commit()
+        st.session_state[("dedup", uploaded_file.file_id, periode)] = deduplicator.fingerprints
+        report = deduplicator.report()
+        if report["duplikat_unggahan_sebelumnya"] > 0:
+            st.warning(f"⚠ **Duplikat dari Unggahan Sebelumnya:** {report['duplikat_unggahan_sebelumnya']} (tidak dikelompokkan)")
+        if report["duplikat_dalam_unggahan"] > 0:
+            st.warning(f"⚠ **Duplikat dalam File Ini:** {report['duplikat_dalam_unggahan']} (tidak dikelompokkan)")
+
+    if uploaded_file and uploaded_file.size > STREAMING_THRESHOLD_BYTES:
+        # --- Mode streaming untuk file besar: dibaca dan dikelompokkan per chunk ---
+        batch_stats = ClusterStats(cluster_predictor.n_clusters)
+        deduplicator = make_deduplicator()
+        hasil_fd, hasil_path = tempfile.mkstemp(suffix=".csv")
+        os.close(hasil_fd)
+        try:
+            with st.spinner("⏳ Memproses file per bagian..."):
+                with open(hasil_path, "w", newline="", encoding="utf-8") as hasil_file:
+                    ringkasan = process_upload_streaming(
+                        uploaded_file, uploaded_file.name, registry.preprocessing_pipeline, cluster_predictor,
+                        registry.clustering_pipeline, hasil_file, cluster_stats=batch_stats,
+                        deduplicator=deduplicator
+                    )
+
+            st.success("✅ Data berhasil diproses!")
+            st.write(f"📊 **Total Data Awal:** {ringkasan['total_awal']}")
+            st.write(f"✅ **Total Data Setelah Preprocessing:** {ringkasan['total_setelah']}")
+            if ringkasan["total_dihapus"] > 0:
+                st.warning(f"⚠ **Jumlah Data yang Dihapus:** {ringkasan['total_dihapus']} (data yang memiliki nilai kosong)")
+            commit_deduplicator(deduplicator)
+            if ringkasan["nip_tidak_unik"] > 0:
+                st.warning(f"⚠ **NIP Tidak Unik:** {ringkasan['nip_tidak_unik']} NIP muncul lebih dari sekali. Setiap baris tetap dinilai terpisah; periksa kembali data tersebut.")
+
+            st.subheader("📋 Hasil Pengelompokan & Kinerja Pegawai")
+            st.caption(f"Menampilkan {len(ringkasan['preview'])} baris pertama. Unduh file untuk hasil lengkap.")
+            paginated_table(ringkasan["preview"], key="clustering_preview")
+
+            batch_summary = batch_stats.summary()
+            st.write(f"📐 **SSE terhadap centroid model:** {batch_stats.sse(cluster_predictor.centroids):.4f}")
+            st.write(f"📐 **Davies-Bouldin Index (DBI):** {batch_summary['DBI']:.4f}")
+            st.write(f"📐 **Silhouette:** {batch_summary['Silhouette']:.4f}")
+            st.caption("Rata-rata Silhouette per klaster (mendekati 1: anggota klaster rapat dan terpisah dari klaster lain).")
+            st.dataframe(batch_stats.cluster_summary()[["Cluster", "Jumlah Data", "Silhouette"]], hide_index=True)
+
+            with open(hasil_path, "rb") as hasil_file:
+                st.download_button(
+                    label="Unduh Hasil Clustering",
+                    data=hasil_file,
+                    file_name="Hasil_Kelompokkan.csv",
+                    mime="text/csv"
+                )
+        except Exception as e:
+            st.error(f"❌ Terjadi kesalahan dalam pengelompokan: {e}")
+        finally:
+            if os.path.exists(hasil_path):
+                os.remove(hasil_path)
+
+    elif uploaded_file:
         # Panggil fungsi untuk memproses data yang diunggah
-        processed_data, df_nip, total_awal, total_setelah, total_hapus = process_uploaded_data(uploaded_file)
+        with stage("baca_file") as record:
+            processed_data, df_nip, total_awal, total_setelah, total_hapus = process_uploaded_data(uploaded_file)
+            record.rows_out = total_awal
 
         if processed_data is not None:
             st.success("✅ Data berhasil diproses!")
@@ -699,96 +853,53 @@ if menu == "Clustering":
             if total_hapus > 0:
                 st.warning(f"⚠ **Jumlah Data yang Dihapus:** {total_hapus} (data yang memiliki nilai kosong)")
 
-            # --- Pastikan data tidak memiliki NaN sebelum proses kategori ---
-            processed_data = processed_data.dropna(subset=["Nilai P", "Nilai K"]).copy()
-
-            # --- Menentukan P dan K secara manual ---
-            kategori_p_list = []
-            kategori_p_num_list = []
-            kategori_k_list = []
-            kategori_k_num_list = []
-
-            for _, row in processed_data.iterrows():
-                nilai_p = row["Nilai P"]
-                nilai_k = row["Nilai K"]
-
-                # Kategori P (Manual)
-                if nilai_p >= 101:
-                    kategori_p_list.append("P1")
-                    kategori_p_num_list.append(1)
-                elif 91 <= nilai_p <= 100:
-                    kategori_p_list.append("P2")
-                    kategori_p_num_list.append(2)
-                elif 81 <= nilai_p <= 90:
-                    kategori_p_list.append("P3")
-                    kategori_p_num_list.append(3)
-                elif 71 <= nilai_p <= 80:
-                    kategori_p_list.append("P4")
-                    kategori_p_num_list.append(4)
-                else:
-                    kategori_p_list.append("P5")
-                    kategori_p_num_list.append(5)
-
-                # Kategori K (Manual)
-                if 1 <= nilai_k < 2:
-                    kategori_k_list.append("K1")
-                    kategori_k_num_list.append(1)
-                elif 2 <= nilai_k < 3:
-                    kategori_k_list.append("K2")
-                    kategori_k_num_list.append(2)
-                elif 3 <= nilai_k < 4:
-                    kategori_k_list.append("K3")
-                    kategori_k_num_list.append(3)
-                elif 4 <= nilai_k <= 5:
-                    kategori_k_list.append("K4")
-                    kategori_k_num_list.append(4)
-                else:
-                    kategori_k_list.append("Tidak termasuk kategori")
-                    kategori_k_num_list.append(None)
-
-            # Menambahkan kategori ke dataframe
-            processed_data["P"] = kategori_p_list
-            processed_data["P_num"] = kategori_p_num_list
-            processed_data["K"] = kategori_k_list
-            processed_data["K_num"] = kategori_k_num_list
-
-            # --- Proses Data dengan Pipeline ---
+            # --- Menentukan P dan K untuk seluruh data sekaligus, lalu terapkan skema tipe ringkas ---
+            with stage("banding_skema", rows_in=len(processed_data)) as record:
+                processed_data = apply_schema(add_bands(processed_data))
+                record.rows_out = len(processed_data)
+
+            # --- Proses Data dengan Pipeline (mode kolumnar, tanpa salinan per langkah) ---
             try:
-                processed_data_preprocessed = preprocessing_pipeline.transform(processed_data)
-                processed_data_preprocessed['Cluster'] = kmeans_model.predict(processed_data_preprocessed[['P_num', 'K_num']])
-                final_data = clustering_pipeline.transform(processed_data_preprocessed)
-
-                # Gabungkan hasil dengan dataset asli
-                final_data["Nama Pegawai"] = processed_data["Nama Pegawai"]
-                final_data["Bagian/Fakultas"] = processed_data["Bagian/Fakultas"]
-                final_data["Nilai P"] = processed_data["Nilai P"]
-                final_data["P"] = processed_data["P"]
-                final_data["P_num"] = processed_data["P_num"]
-                final_data["Nilai K"] = processed_data["Nilai K"]
-                final_data["K"] = processed_data["K"]
-                final_data["K_num"] = processed_data["K_num"]
-
-                # --- Pastikan df_nip memiliki kolom NIP sebelum merge ---
-                if "NIP" not in df_nip.columns:
-                    st.error("❌ Kolom 'NIP' tidak ditemukan dalam df_nip!")
-
-                # Pastikan df_nip hanya memiliki kolom "NIP" dan "Nama Pegawai"
-                df_nip = df_nip[["NIP", "Nama Pegawai"]].copy()
-
-                # Lakukan merge dengan final_data
-                final_data = df_nip.merge(final_data, on="Nama Pegawai", how="left")
-
-                # Jika terjadi duplikasi kolom NIP akibat merge, hapus salah satu dan pastikan nama tetap "NIP"
-                if "NIP_x" in final_data.columns and "NIP_y" in final_data.columns:
-                    final_data.drop(columns=["NIP_y"], inplace=True)  # Hapus NIP_y
-                    final_data.rename(columns={"NIP_x": "NIP"}, inplace=True)  # Ganti NIP_x menjadi NIP
-
-                # **Atur ulang urutan kolom agar "NIP" berada di paling depan**
-                final_data = final_data[["NIP"] + [col for col in final_data.columns if col != "NIP"]]
+                # Data dengan nilai kosong, Nilai K di luar kategori, atau duplikat tidak ikut dikelompokkan
+                row_mask = (processed_data["K_num"] != 0).to_numpy()
+                deduplicator = make_deduplicator()
+                if deduplicator is not None:
+                    with stage("deduplikasi", rows_in=int(row_mask.sum())) as record:
+                        row_mask = deduplicator.filter(processed_data, row_mask & processed_data.notna().all(axis=1).to_numpy())
+                        record.rows_out = int(row_mask.sum())
+                final_data, features = score_columnar(
+                    processed_data, registry.preprocessing_pipeline, cluster_predictor, row_mask=row_mask
+                )
+                commit_deduplicator(deduplicator)
+
+                # Kualitas klaster untuk batch yang diunggah (dari statistik per klaster)
+                batch_stats = ClusterStats.from_data(
+                    features, final_data['Cluster'], n_clusters=cluster_predictor.n_clusters
+                )
+
+                # --- NIP seharusnya unik; nama pegawai tidak dipakai sebagai kunci ---
+                nip_duplikat = df_nip["NIP"].dropna()
+                nip_duplikat = nip_duplikat[nip_duplikat.duplicated(keep=False)].unique()
+                if len(nip_duplikat) > 0:
+                    contoh = ", ".join(str(nip) for nip in nip_duplikat[:5])
+                    st.warning(f"⚠ **NIP Tidak Unik:** {len(nip_duplikat)} NIP muncul lebih dari sekali (misalnya {contoh}). Setiap baris tetap dinilai terpisah; periksa kembali data tersebut.")
+
+                # Gabungkan hasil dengan identitas pegawai berdasarkan indeks baris (satu baris hasil per baris input)
+                identitas = processed_data[["NIP", "Nama Pegawai", "Bagian/Fakultas"]]
+                with stage("gabung_identitas", rows_in=len(final_data)) as record:
+                    final_data = identitas.join(final_data.drop(columns=identitas.columns), how="left")
+                    record.rows_out = len(final_data)
 
                 # Tampilkan hasil setelah perbaikan
                 st.subheader("📋 Hasil Pengelompokan & Kinerja Pegawai")
-                st.dataframe(final_data)
+                paginated_table(final_data, key="clustering")
+
+                batch_summary = batch_stats.summary()
+                st.write(f"📐 **SSE terhadap centroid model:** {batch_stats.sse(cluster_predictor.centroids):.4f}")
+                st.write(f"📐 **Davies-Bouldin Index (DBI):** {batch_summary['DBI']:.4f}")
+                st.write(f"📐 **Silhouette:** {batch_summary['Silhouette']:.4f}")
+                st.caption("Rata-rata Silhouette per klaster (mendekati 1: anggota klaster rapat dan terpisah dari klaster lain).")
+                st.dataframe(batch_stats.cluster_summary()[["Cluster", "Jumlah Data", "Silhouette"]], hide_index=True)
 
 
                 # Pilih hanya kolom yang diperlukan untuk diunduh
@@ -801,7 +912,8 @@ if menu == "Clustering":
                 }, inplace=True)
 
                 # Konversi ke CSV tanpa indeks
-                final_data_csv = final_data_download.to_csv(index=False)
+                with stage("ekspor_csv", rows_in=len(final_data_download)):
+                    final_data_csv = final_data_download.to_csv(index=False)
 
                 st.download_button(
                     label="Unduh Hasil Clustering",
@@ -815,3 +927,15 @@ if menu == "Clustering":
                 st.error(f"❌ Terjadi kesalahan dalam pengelompokan: {e}")
 
 
+# --- Hasil profiling rerun ini (hanya jika SIKERJA_PROFILE=1) ---
+# Eksekusi terakhir disimpan per sesi, sehingga sidebar tidak menampilkan eksekusi pengguna lain
+profil_run = profiler.finish_run()
+if profil_run:
+    st.session_state["profil_terakhir"] = profil_run
+profil_run = st.session_state.get("profil_terakhir")
+if profiler.enabled and profil_run:
+    with st.sidebar.expander("Profiling"):
+        st.caption(f"Eksekusi terakhir: {profil_run['run']} ({profil_run['started']})")
+        st.dataframe(profiler.frame(profil_run), hide_index=True)
+        st.download_button("Unduh JSON", json.dumps(profil_run, indent=2), file_name="profile.json", mime="application/json")
+        st.download_button("Unduh Prometheus", profiler.prometheus_text(profil_run), file_name="profile.prom", mime="text/plain")
@@ -0,0 +1,84 @@
+"""
+Agregat kategori untuk menu "Visualisasi Data".
+
+`CategoryCounts` menyimpan jumlah data per kategori `Nilai Kinerja` dan diperbarui secara
+inkremental setiap kali data baru ditambahkan (O(baris baru)), sehingga jumlah dan persentase
+tidak dihitung ulang dengan `value_counts()` pada setiap rerun. `version` bertambah setiap kali
+agregat berubah dan dipakai sebagai kunci cache grafik.
+"""
+import io
+import threading
+
+import pandas as pd
+
+
+class CategoryCounts:
+    """Jumlah data per kategori yang dapat diperbarui secara inkremental."""
+    def __init__(self, column="Nilai Kinerja"):
+        self.column = column
+        self.counts = {}
+        self.n_rows = 0
+        self.version = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, data, column="Nilai Kinerja"):
+        return cls(column).update(data)
+
+    def update(self, rows):
+        """Menambahkan baris baru (DataFrame atau list of dict)."""
+        rows = pd.DataFrame(rows)
+        values = rows[self.column] if self.column in rows.columns else pd.Series([], dtype=object)
+        batch = values.value_counts()
+        with self._lock:
+            for category, count in batch.items():
+                self.counts[category] = self.counts.get(category, 0) + int(count)
+            self.n_rows += len(rows)
+            self.version += 1
+        return self
+
+    @property
+    def total(self):
+        """Jumlah data dengan kategori terisi (setara `Series.count()`)."""
+        return sum(self.counts.values())
+
+    def series(self):
+        """Jumlah per kategori, terurut menurun seperti `value_counts()`."""
+        with self._lock:
+            counts = pd.Series(self.counts, dtype="int64")
+        return counts[counts > 0].sort_values(ascending=False, kind="stable")
+
+    def percentages(self):
+        counts = self.series()
+        return counts / counts.sum() * 100 if len(counts) else counts.astype(float)
+
+    def key(self):
+        """Kunci cache: versi agregat beserta isinya (versi mulai dari 0 lagi saat agregat dibangun ulang)."""
+        with self._lock:
+            return self.version, tuple(sorted((str(category), count) for category, count in self.counts.items()))
+
+
+def render_category_chart(counts, percentages):
+    """Menggambar bar chart distribusi kategori dan mengembalikannya sebagai PNG (bytes)."""
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(10, 6))  # Ukuran figure diperbesar untuk tampilan lebih jelas
+    bars = ax.bar(counts.index, counts.values)
+
+    # Menambahkan label jumlah data di atas setiap bar
+    for bar, count, percent in zip(bars, counts.values, percentages):
+        ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 2,
+                f"{count} ({percent:.1f}%)", ha='center', fontsize=12, fontweight="bold")
+
+    # Menyesuaikan tampilan
+    ax.set_xlabel("Kategori Nilai Kinerja", fontsize=14)
+    ax.set_ylabel("Jumlah Pegawai", fontsize=14)
+    ax.set_title("Distribusi Kinerja Pegawai Berdasarkan Kategori", fontsize=16, fontweight="bold")
+    ax.set_xticks(range(len(counts.index)))
+    ax.set_xticklabels(counts.index, rotation=45, ha='right')
+    ax.grid(axis='y', linestyle='--', alpha=0.7)  # Menambahkan grid horizontal
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", bbox_inches="tight")
+    plt.close(fig)
+    return buffer.getvalue()
@@ -0,0 +1,78 @@
+"""
+Pengelompokan (banding) Nilai P dan Nilai K menjadi kategori P1-P5 dan K1-K4.
+
+Modul ini adalah satu-satunya tempat ambang batas P dan K didefinisikan, dan dipakai
+oleh semua menu di DEPLOYFINAL.py maupun notebook model. Semua fungsi bekerja pada
+satu batch sekaligus (np.digitize), bukan per baris.
+"""
+import numpy as np
+import pandas as pd
+
+# --- Ambang Batas ---
+# Performance (P):  P1 (>= 101), P2 (91 - 100), P3 (81 - 90), P4 (71 - 80), P5 (<= 70)
+P_EDGES = np.array([71, 81, 91, 101])
+# Soft Kompetensi (K): K1 [1, 2), K2 [2, 3), K3 [3, 4), K4 [4, 5]
+K_EDGES = np.array([1, 2, 3, 4])
+K_MIN, K_MAX = 1, 5
+
+INVALID_CODE = 0  # Nilai tidak valid
+INVALID_LABEL = "Tidak termasuk kategori"
+
+P_LABELS = np.array([INVALID_LABEL, "P1", "P2", "P3", "P4", "P5"], dtype=object)
+K_LABELS = np.array([INVALID_LABEL, "K1", "K2", "K3", "K4"], dtype=object)
+
+
+def _as_float_array(values):
+    return pd.to_numeric(pd.Series(np.ravel(values)), errors="coerce").to_numpy(dtype=float)
+
+
+def band_p(nilai_p):
+    """Mengubah Nilai P menjadi kode P_num (1-5); NaN mendapat kode 0."""
+    nilai_p = _as_float_array(nilai_p)
+    codes = (len(P_EDGES) + 1 - np.digitize(nilai_p, P_EDGES)).astype(np.int64)
+    codes[np.isnan(nilai_p)] = INVALID_CODE
+    return codes
+
+
+def band_k(nilai_k):
+    """Mengubah Nilai K menjadi kode K_num (1-4); nilai di luar rentang 1-5 mendapat kode 0."""
+    nilai_k = _as_float_array(nilai_k)
+    valid = (nilai_k >= K_MIN) & (nilai_k <= K_MAX)
+    return np.where(valid, np.digitize(nilai_k, K_EDGES), INVALID_CODE).astype(np.int64)
+
+
+def band_pk(nilai_p, nilai_k, index=None):
+    """
+    Menghasilkan kolom P, P_num, K, dan K_num untuk seluruh batch dalam satu langkah.
+    Kode 0 dan label 'Tidak termasuk kategori' menandakan nilai yang tidak valid.
+    """
+    if index is None and isinstance(nilai_p, pd.Series):
+        index = nilai_p.index
+    p_num = band_p(nilai_p)
+    k_num = band_k(nilai_k)
+    return pd.DataFrame({
+        "P": P_LABELS[p_num],
+        "P_num": p_num,
+        "K": K_LABELS[k_num],
+        "K_num": k_num,
+    }, index=index)
+
+
+def add_bands(df, p_column="Nilai P", k_column="Nilai K"):
+    """Menambahkan (atau menimpa) kolom P, P_num, K, dan K_num pada DataFrame secara in-place."""
+    bands = band_pk(df[p_column], df[k_column], index=df.index)
+    for col in bands.columns:
+        df[col] = bands[col]
+    return df
+
+
+def kategori_p(nilai_p):
+    """Kategori P untuk satu nilai, misalnya ('P2', 2)."""
+    code = int(band_p([nilai_p])[0])
+    return P_LABELS[code], code
+
+
+def kategori_k(nilai_k):
+    """Kategori K untuk satu nilai, misalnya ('K1', 1)."""
+    code = int(band_k([nilai_k])[0])
+    return K_LABELS[code], code
@@ -0,0 +1,135 @@
+"""
+Mode preprocessing kolumnar untuk batch unggahan.
+
+Pipeline preprocessing biasa menyalin seluruh DataFrame di setiap langkah (`dropna`,
+`drop_duplicates`, `X.copy()`, `reset_index`), padahal K-Means hanya membutuhkan P_num/K_num.
+Mode ini menjalankan langkah yang sama dengan parameter dari pipeline yang sudah dilatih:
+- hapus NaN dan duplikat -> mask baris (DataFrame tidak disalin)
+- numerisasi -> langsung ditulis ke satu blok NumPy kontigu (Nilai P, Nilai K, P_num, K_num)
+- winsorize -> `np.clip` in-place pada blok tersebut
+
+Kolom identitas (NIP, nama, unit) dan nilai asli diambil sekali berdasarkan posisi baris,
+sehingga setiap batch hanya menghasilkan satu salinan: tabel hasil.
+"""
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from outliers import winsorize_bounds
+from profiling import stage
+
+PIPELINE_STEPS = ["missing_value_handler", "duplicate_handler", "numerisasi_handler", "outlier_handler"]
+FEATURE_COLUMNS = ["Nilai P", "Nilai K", "P_num", "K_num"]
+ID_COLUMNS = ["NIP", "Nama Pegawai", "Bagian/Fakultas"]
+RESULT_COLUMNS = ["Nilai P", "P", "P_num", "Nilai K", "K", "K_num"]
+
+
+def supports_columnar(preprocessing_pipeline):
+    """Mode kolumnar hanya dipakai untuk pipeline dengan urutan langkah standar."""
+    return list(getattr(preprocessing_pipeline, "named_steps", {})) == PIPELINE_STEPS
+
+
+def preprocess_columnar(df, preprocessing_pipeline, row_mask=None):
+    """
+    Menjalankan preprocessing pada blok NumPy.
+    Mengembalikan (posisi baris yang lolos, blok float n x 4 berisi FEATURE_COLUMNS setelah winsorize).
+    """
+    steps = preprocessing_pipeline.named_steps
+
+    # Hapus NaN dan duplikat (semua kolom, seperti MissingValueHandler dan DuplicateHandler)
+    with stage("hapus_nan_duplikat", rows_in=len(df)) as record:
+        keep = df.notna().all(axis=1).to_numpy()
+        if row_mask is not None:
+            keep &= np.asarray(row_mask, dtype=bool)
+        keep &= ~df.duplicated().to_numpy()
+        positions = np.flatnonzero(keep)
+        record.rows_out = len(positions)
+
+    # Numerisasi langsung ke blok fitur
+    with stage("numerisasi", rows_in=len(positions)) as record:
+        block = np.empty((len(positions), len(FEATURE_COLUMNS)))
+        numerisasi_map = steps["numerisasi_handler"].numerisasi_map
+        for j, col in enumerate(FEATURE_COLUMNS):
+            source = col[:-len("_num")] if col.endswith("_num") else None
+            if source in numerisasi_map and source in df.columns:
+                block[:, j] = pd.Series(df[source].to_numpy()[positions]).map(numerisasi_map[source]).to_numpy(dtype=float)
+            else:
+                block[:, j] = df[col].to_numpy(dtype=float)[positions]
+        record.rows_out = len(block)
+
+    # Winsorize dengan batas hasil fit (atau batas dari batch ini untuk pipeline lama)
+    with stage("winsorize", rows_in=len(block)) as record:
+        outlier_handler = steps["outlier_handler"]
+        if hasattr(outlier_handler, "columns_"):
+            lower = np.full(len(FEATURE_COLUMNS), -np.inf)
+            upper = np.full(len(FEATURE_COLUMNS), np.inf)
+            for j, col in enumerate(FEATURE_COLUMNS):
+                if col in outlier_handler.columns_:
+                    k = outlier_handler.columns_.index(col)
+                    lower[j], upper[j] = outlier_handler.lower_[k], outlier_handler.upper_[k]
+        else:
+            lower, upper = winsorize_bounds(block, outlier_handler.limits)
+        np.clip(block, lower, upper, out=block)
+        record.rows_out = len(block)
+    return positions, block
+
+
+def score_columnar(df, preprocessing_pipeline, cluster_predictor, id_columns=ID_COLUMNS, row_mask=None):
+    """
+    Preprocessing kolumnar, prediksi klaster, dan kategori Nilai Kinerja untuk satu batch.
+
+    Mengembalikan (hasil, fitur):
+    - hasil: DataFrame berisi kolom identitas, nilai asli (Nilai P, P, P_num, Nilai K, K, K_num),
+      Cluster, dan Nilai Kinerja; indeks mengikuti indeks baris `df`.
+    - fitur: array n x 2 P_num/K_num setelah winsorize (yang dipakai untuk klasterisasi).
+    `cluster_predictor` harus memiliki `predict_cells` dan `categorize` (misalnya LightweightModel).
+    """
+    positions, block = preprocess_columnar(df, preprocessing_pipeline, row_mask)
+    features = block[:, 2:4]
+
+    # `take` pada array pandas mempertahankan tipe ringkas (category, int8, Int64)
+    with stage("ambil_kolom", rows_in=len(positions)):
+        columns = {
+            col: df[col].array.take(positions)
+            for col in [*id_columns, *RESULT_COLUMNS] if col in df.columns
+        }
+    with stage("prediksi_klaster", rows_in=len(features)):
+        columns["Cluster"] = cluster_predictor.predict_cells(features[:, 0], features[:, 1])
+    with stage("kategori", rows_in=len(features)):
+        columns["Nilai Kinerja"] = cluster_predictor.categorize(features[:, 0], features[:, 1])
+    return pd.DataFrame(columns, index=df.index[positions], copy=False), features
+
+
+# --- Benchmark Memori ---
+def _peak_memory(function):
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark_memory(df, preprocessing_pipeline, clustering_pipeline, cluster_predictor):
+    """
+    Membandingkan puncak alokasi memori (tracemalloc) pipeline biasa dan mode kolumnar untuk `df`
+    yang sudah memiliki kolom P, P_num, K, dan K_num. Mengembalikan DataFrame ringkasan dalam MB.
+    """
+    def legacy():
+        batch = df[df["K_num"] != 0]
+        preprocessed = preprocessing_pipeline.transform(batch)
+        preprocessed["Cluster"] = cluster_predictor.predict_cells(preprocessed["P_num"], preprocessed["K_num"])
+        final = clustering_pipeline.transform(preprocessed)
+        for col in ["Nama Pegawai", "Bagian/Fakultas", *RESULT_COLUMNS]:
+            final[col] = batch[col]
+
+    def columnar():
+        score_columnar(df, preprocessing_pipeline, cluster_predictor, row_mask=df["K_num"] != 0)
+
+    rows = []
+    for mode, function in [("Pipeline biasa", legacy), ("Kolumnar", columnar)]:
+        rows.append({"Mode": mode, "Jumlah Baris": len(df), "Puncak Memori (MB)": _peak_memory(function) / 2**20})
+    result = pd.DataFrame(rows)
+    result["Rasio"] = result["Puncak Memori (MB)"] / result["Puncak Memori (MB)"].iloc[0]
+    return result
@@ -0,0 +1,193 @@
+"""
+Deduplikasi bertahap antarunggahan berbasis sidik jari (fingerprint) baris 64-bit.
+
+`DuplicateHandler` hanya membuang duplikat di dalam satu batch. Modul ini menyimpan himpunan
+sidik jari dari semua unggahan sebelumnya sehingga data yang sudah pernah diunggah ikut terdeteksi
+tanpa memuat ulang seluruh riwayat.
+
+- Sidik jari: hash 64-bit dari NIP + periode + Nilai P + Nilai K (`pd.util.hash_pandas_object`).
+- Penyimpanan: file `.npy` berisi array uint64 terurut (8 byte per baris) ditambah file delta
+  append-only untuk unggahan terbaru; delta digabungkan ke file utama setelah melewati
+  `compact_threshold` (ditulis ke file sementara lalu `os.replace`).
+- Pemeriksaan satu chunk: `np.searchsorted` pada array utama + himpunan delta, O(chunk).
+- Sidik jari satu unggahan baru disimpan lewat `commit()` setelah seluruh file selesai diproses,
+  sehingga unggahan yang gagal di tengah jalan tidak tercatat sebagian.
+"""
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_FINGERPRINT_PATH = os.environ.get("SIKERJA_FINGERPRINTS", "Data_Kpi_fingerprints.npy")
+KEY_COLUMNS = ["NIP", "Periode", "Nilai P", "Nilai K"]
+
+
+def canonical_nip(values):
+    """
+    Bentuk baku NIP untuk sidik jari, apa pun tipe kolomnya: NIP angka ("00123", "123.0", 123 Int64)
+    menjadi digit tanpa nol di depan ("123"); NIP bukan angka hanya dibuang spasinya.
+    """
+    text = pd.Series(values).astype("string").str.strip()
+    numeric = text.str.fullmatch(r"\d+(?:\.0*)?").fillna(False).to_numpy(dtype=bool)
+    digits = text.str.replace(r"\.0*$", "", regex=True).str.lstrip("0").replace("", "0")
+    return text.where(~numeric, digits).fillna("")
+
+
+def row_fingerprints(df, period=""):
+    """
+    Sidik jari uint64 per baris dari NIP (`canonical_nip`), periode, Nilai P, dan Nilai K.
+    Kolom `Periode` dipakai bila ada; jika tidak, `period` berlaku untuk semua baris.
+    """
+    key = pd.DataFrame({
+        "NIP": canonical_nip(df["NIP"]).to_numpy(dtype=object),
+        "Periode": (
+            df["Periode"].astype("string").str.strip().fillna("").to_numpy(dtype=object)
+            if "Periode" in df.columns else np.full(len(df), str(period), dtype=object)
+        ),
+        "Nilai P": pd.to_numeric(df["Nilai P"], errors="coerce").to_numpy(dtype=float),
+        "Nilai K": pd.to_numeric(df["Nilai K"], errors="coerce").to_numpy(dtype=float),
+    }, columns=KEY_COLUMNS)
+    return pd.util.hash_pandas_object(key, index=False).to_numpy(dtype=np.uint64)
+
+
+class FingerprintStore:
+    """Himpunan sidik jari persisten: array utama terurut + delta append-only."""
+    def __init__(self, path=DEFAULT_FINGERPRINT_PATH, compact_threshold=100_000):
+        self.path = path
+        self.delta_path = path + ".delta"
+        self.compact_threshold = compact_threshold
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        base = np.load(self.path) if os.path.exists(self.path) else np.empty(0, dtype=np.uint64)
+        delta = np.empty(0, dtype=np.uint64)
+        if os.path.exists(self.delta_path):
+            with open(self.delta_path, "rb") as handle:
+                raw = handle.read()
+            # Penulisan terakhir yang terpotong (tidak kelipatan 8 byte) diabaikan
+            delta = np.frombuffer(raw[:len(raw) - len(raw) % 8], dtype=np.uint64)
+        self._base = np.unique(base.astype(np.uint64))
+        self._delta = set(np.setdiff1d(delta, self._base).tolist())
+
+    def __len__(self):
+        return len(self._base) + len(self._delta)
+
+    def contains(self, fingerprints):
+        """Mask boolean: sidik jari mana yang sudah tercatat dari unggahan sebelumnya."""
+        with self._lock:
+            return self._contains_unlocked(np.asarray(fingerprints, dtype=np.uint64))
+
+    def add(self, fingerprints):
+        """Menambahkan sidik jari baru (satu penulisan append ke file delta)."""
+        fingerprints = np.unique(np.asarray(fingerprints, dtype=np.uint64))
+        with self._lock:
+            fingerprints = fingerprints[~self._contains_unlocked(fingerprints)]
+            if not len(fingerprints):
+                return 0
+            directory = os.path.dirname(os.path.abspath(self.delta_path))
+            os.makedirs(directory, exist_ok=True)
+            with open(self.delta_path, "ab") as handle:
+                handle.write(fingerprints.tobytes())
+                handle.flush()
+                os.fsync(handle.fileno())
+            self._delta.update(fingerprints.tolist())
+            if len(self._delta) >= self.compact_threshold:
+                self._compact_unlocked()
+        return len(fingerprints)
+
+    def _contains_unlocked(self, fingerprints):
+        found = np.zeros(len(fingerprints), dtype=bool)
+        if len(self._base):
+            positions = np.minimum(np.searchsorted(self._base, fingerprints), len(self._base) - 1)
+            found = self._base[positions] == fingerprints
+        if self._delta:
+            found |= np.fromiter((value in self._delta for value in fingerprints.tolist()), dtype=bool, count=len(fingerprints))
+        return found
+
+    def compact(self):
+        """Menggabungkan delta ke file utama."""
+        with self._lock:
+            self._compact_unlocked()
+
+    def _compact_unlocked(self):
+        merged = np.union1d(self._base, np.fromiter(self._delta, dtype=np.uint64, count=len(self._delta)))
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "wb") as handle:
+            np.save(handle, merged)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_path, self.path)
+        # Jika proses berhenti sebelum delta dikosongkan, isi delta hanya menjadi duplikat file utama
+        open(self.delta_path, "wb").close()
+        self._base = merged
+        self._delta = set()
+
+    def clear(self):
+        """Menghapus seluruh riwayat sidik jari."""
+        with self._lock:
+            for path in (self.path, self.delta_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._base = np.empty(0, dtype=np.uint64)
+            self._delta = set()
+
+
+class UploadDeduplicator:
+    """
+    Deduplikasi untuk satu unggahan (bisa terdiri dari beberapa chunk).
+    Memisahkan duplikat dari unggahan sebelumnya dan duplikat di dalam unggahan ini.
+
+    `own_fingerprints` berisi sidik jari yang sudah disimpan oleh unggahan yang sama sebelumnya
+    (misalnya saat Streamlit menjalankan ulang skrip untuk file yang sama); sidik jari tersebut
+    tidak dihitung sebagai duplikat dari unggahan sebelumnya.
+    """
+    def __init__(self, store, period="", own_fingerprints=None):
+        self.store = store
+        self.period = period
+        self.own_fingerprints = np.unique(np.asarray(
+            [] if own_fingerprints is None else own_fingerprints, dtype=np.uint64
+        ))
+        self.fingerprints = np.empty(0, dtype=np.uint64)
+        self.n_previous = 0
+        self.n_within = 0
+        self._seen = set()
+        self._pending = []
+
+    def filter(self, chunk, candidates=None):
+        """
+        Mask baris `chunk` yang bukan duplikat. Hanya baris `candidates` (mask, default semua baris)
+        yang diperiksa dan dicatat; baris lainnya dianggap sudah dibuang oleh langkah lain.
+        """
+        keep = np.ones(len(chunk), dtype=bool) if candidates is None else np.asarray(candidates, dtype=bool).copy()
+        positions = np.flatnonzero(keep)
+        fingerprints = row_fingerprints(chunk.iloc[positions], self.period)
+
+        previous = self.store.contains(fingerprints)
+        if len(self.own_fingerprints):
+            previous &= ~np.isin(fingerprints, self.own_fingerprints)
+        within = pd.Series(fingerprints).duplicated().to_numpy()
+        if self._seen:
+            within |= np.fromiter((value in self._seen for value in fingerprints.tolist()), dtype=bool, count=len(fingerprints))
+        within &= ~previous
+
+        keep[positions[previous | within]] = False
+        self.n_previous += int(previous.sum())
+        self.n_within += int(within.sum())
+
+        new = fingerprints[~(previous | within)]
+        self._seen.update(new.tolist())
+        self._pending.append(new)
+        return keep
+
+    def commit(self):
+        """Menyimpan sidik jari unggahan ini ke penyimpanan persisten (tersedia di `fingerprints`)."""
+        if not self._pending:
+            return 0
+        self.fingerprints = np.concatenate([self.fingerprints, *self._pending])
+        self._pending = []
+        return self.store.add(self.fingerprints)
+
+    def report(self):
+        return {"duplikat_unggahan_sebelumnya": self.n_previous, "duplikat_dalam_unggahan": self.n_within}
@@ -0,0 +1,183 @@
+"""
+Evaluasi kualitas klaster (SSE, Davies-Bouldin Index, dan Silhouette) dari statistik cukup per klaster.
+
+`ClusterStats` menyimpan jumlah data, jumlah koordinat, dan jumlah kuadrat untuk setiap klaster,
+ditambah histogram titik unik per klaster (fitur P_num/K_num hanya memiliki paling banyak 20 titik).
+SSE, centroid, scatter DBI, dan jarak antar centroid dihitung dari statistik tersebut tanpa
+membaca ulang seluruh data, dan statistik dari beberapa batch dapat digabungkan. Silhouette
+dihitung tepat dari histogram titik unik (`silhouette.silhouette_points`).
+"""
+import numpy as np
+import pandas as pd
+
+from silhouette import silhouette_points
+from training import collapse_points
+
+
+class ClusterStats:
+    """Statistik cukup per klaster yang dapat diperbarui dan digabungkan antar batch."""
+    def __init__(self, n_clusters, n_features=2, track_points=True):
+        self.n_clusters = n_clusters
+        self.n_features = n_features
+        self.track_points = track_points
+
+        self.counts = np.zeros(n_clusters)
+        self.sums = np.zeros((n_clusters, n_features))
+        self.sumsq = np.zeros(n_clusters)
+
+        # Histogram titik unik: point_counts[klaster, titik]
+        self.points = np.empty((0, n_features))
+        self.point_counts = np.zeros((n_clusters, 0))
+
+    @classmethod
+    def from_data(cls, features, labels, n_clusters=None, sample_weight=None, track_points=True):
+        """Membuat statistik dari fitur dan label klaster."""
+        features = np.asarray(features, dtype=float)
+        labels = np.asarray(labels, dtype=np.intp)
+        if n_clusters is None:
+            n_clusters = int(labels.max()) + 1 if labels.size else 0
+        stats = cls(n_clusters, features.shape[1], track_points=track_points)
+        return stats.update(features, labels, sample_weight=sample_weight)
+
+    def update(self, features, labels, sample_weight=None):
+        """Menambahkan satu batch data (in-place) dalam O(batch)."""
+        features = np.asarray(features, dtype=float).reshape(-1, self.n_features)
+        labels = np.asarray(labels, dtype=np.intp).ravel()
+        weight = np.ones(len(labels)) if sample_weight is None else np.asarray(sample_weight, dtype=float)
+        if len(labels) == 0:
+            return self
+
+        k = self.n_clusters
+        self.counts += np.bincount(labels, weights=weight, minlength=k)
+        for j in range(self.n_features):
+            self.sums[:, j] += np.bincount(labels, weights=weight * features[:, j], minlength=k)
+        self.sumsq += np.bincount(labels, weights=weight * (features ** 2).sum(axis=1), minlength=k)
+
+        if self.track_points:
+            points, _, inverse = collapse_points(features)
+            table = np.bincount(
+                labels * len(points) + inverse, weights=weight, minlength=k * len(points)
+            ).reshape(k, len(points))
+            self._add_points(points, table)
+        return self
+
+    def _add_points(self, points, table):
+        combined, _, inverse = collapse_points(np.vstack([self.points, points]))
+        point_counts = np.zeros((self.n_clusters, len(combined)))
+        point_counts[:, inverse[:len(self.points)]] += self.point_counts
+        point_counts[:, inverse[len(self.points):]] += table
+        self.points = combined
+        self.point_counts = point_counts
+
+    def merge(self, other):
+        """Menggabungkan dua statistik (misalnya dari dua chunk data) menjadi statistik baru."""
+        if (other.n_clusters, other.n_features) != (self.n_clusters, self.n_features):
+            raise ValueError("Statistik klaster harus memiliki jumlah klaster dan fitur yang sama.")
+        merged = ClusterStats(self.n_clusters, self.n_features, self.track_points and other.track_points)
+        merged.counts = self.counts + other.counts
+        merged.sums = self.sums + other.sums
+        merged.sumsq = self.sumsq + other.sumsq
+        if merged.track_points:
+            merged.points, merged.point_counts = self.points, self.point_counts
+            merged._add_points(other.points, other.point_counts)
+        return merged
+
+    __add__ = merge
+
+    # --- Metrik ---
+    @property
+    def n_samples(self):
+        return self.counts.sum()
+
+    @property
+    def centroids(self):
+        """Centroid setiap klaster (NaN untuk klaster kosong)."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.sums / self.counts[:, np.newaxis]
+
+    def sse_per_cluster(self, centers=None):
+        """SSE per klaster terhadap centroid data, atau terhadap `centers` (misalnya centroid model)."""
+        if centers is None:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                sse = self.sumsq - np.where(self.counts > 0, (self.sums ** 2).sum(axis=1) / self.counts, 0.0)
+        else:
+            centers = np.asarray(centers, dtype=float)
+            sse = self.sumsq - 2 * (self.sums * centers).sum(axis=1) + self.counts * (centers ** 2).sum(axis=1)
+        return np.maximum(sse, 0.0)
+
+    def sse(self, centers=None):
+        """Total SSE (inertia)."""
+        return float(self.sse_per_cluster(centers).sum())
+
+    def scatter(self):
+        """
+        Rata-rata jarak data ke centroid klasternya (scatter DBI).
+        Tanpa histogram titik, digunakan akar rata-rata kuadrat jarak sebagai pendekatan.
+        """
+        nonempty = self.counts > 0
+        scatter = np.zeros(self.n_clusters)
+        if self.track_points:
+            centroids = self.centroids
+            for c in np.flatnonzero(nonempty):
+                distances = np.sqrt(((self.points - centroids[c]) ** 2).sum(axis=1))
+                scatter[c] = (self.point_counts[c] * distances).sum() / self.counts[c]
+        else:
+            scatter[nonempty] = np.sqrt(self.sse_per_cluster()[nonempty] / self.counts[nonempty])
+        return scatter
+
+    def separations(self):
+        """Jarak antar centroid (k x k)."""
+        centroids = self.centroids
+        return np.sqrt(((centroids[:, np.newaxis, :] - centroids[np.newaxis, :, :]) ** 2).sum(axis=2))
+
+    def davies_bouldin(self):
+        """Davies-Bouldin Index, setara dengan `sklearn.metrics.davies_bouldin_score` untuk klaster yang terisi."""
+        nonempty = np.flatnonzero(self.counts > 0)
+        if len(nonempty) < 2:
+            raise ValueError("Davies-Bouldin Index membutuhkan minimal 2 klaster yang terisi.")
+
+        intra_dists = self.scatter()[nonempty]
+        centroid_distances = self.separations()[np.ix_(nonempty, nonempty)]
+        if np.allclose(intra_dists, 0) or np.allclose(centroid_distances, 0):
+            return 0.0
+
+        centroid_distances[centroid_distances == 0] = np.inf
+        combined_intra_dists = intra_dists[:, np.newaxis] + intra_dists
+        return float(np.mean(np.max(combined_intra_dists / centroid_distances, axis=1)))
+
+    def silhouette_per_cluster(self):
+        """Rata-rata silhouette tepat per klaster dari histogram titik (NaN untuk klaster kosong)."""
+        if not self.track_points:
+            raise ValueError("Silhouette membutuhkan histogram titik (track_points=True).")
+        values = np.nan_to_num(silhouette_points(self.points, self.point_counts))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (values * self.point_counts).sum(axis=1) / self.counts
+
+    def silhouette(self):
+        """Rata-rata silhouette seluruh data, setara dengan `sklearn.metrics.silhouette_score`."""
+        if (self.counts > 0).sum() < 2:
+            raise ValueError("Silhouette membutuhkan minimal 2 klaster yang terisi.")
+        per_cluster = self.silhouette_per_cluster()
+        nonempty = self.counts > 0
+        return float((per_cluster[nonempty] * self.counts[nonempty]).sum() / self.n_samples)
+
+    def summary(self):
+        """Ringkasan metrik: jumlah data, SSE, DBI, dan Silhouette (jika histogram titik tersedia)."""
+        n_nonempty = int((self.counts > 0).sum())
+        return {
+            "Jumlah Data": int(self.n_samples),
+            "SSE": self.sse(),
+            "DBI": self.davies_bouldin() if n_nonempty >= 2 else np.nan,
+            "Silhouette": self.silhouette() if n_nonempty >= 2 and self.track_points else np.nan,
+        }
+
+    def cluster_summary(self):
+        """Tabel per klaster yang terisi: jumlah data, SSE, scatter DBI, dan rata-rata Silhouette."""
+        table = pd.DataFrame({
+            "Cluster": np.arange(self.n_clusters),
+            "Jumlah Data": self.counts.astype(int),
+            "SSE": self.sse_per_cluster(),
+            "Scatter": self.scatter(),
+            "Silhouette": self.silhouette_per_cluster() if self.track_points else np.nan,
+        })
+        return table[self.counts > 0].reset_index(drop=True)
@@ -0,0 +1,228 @@
+"""
+Klasterisasi per kelompok: per unit (Bagian/Fakultas) dan opsional per periode.
+
+Data diurutkan per kelompok lalu fitur P_num/K_num disalin sekali ke shared memory
+(`sharedmem.SharedArray`); setiap kelompok (potongan kontigu) dilatih di process pool: sweep K
+(SSE, DBI, Silhouette) dan model final dengan K terpilih (`n_clusters` tetap, atau DBI terkecil).
+
+Hasilnya disimpan di `GroupModels`: centroid dan tabel klaster per sel P_num x K_num setiap
+kelompok dalam satu file .npz (tanpa pickle). Penilaian mengarahkan setiap baris ke model
+kelompoknya dalam satu operasi vektor (indeks kelompok -> tabel[kelompok, P_num, K_num]);
+kelompok tanpa model (data terlalu sedikit atau kelompok baru) memakai model cadangan, misalnya
+model global.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from scoring import N_K, N_P, CellTablePredictor
+from sharedmem import SharedArray
+from training import FEATURE_COLUMNS, collapse_points, fit_kmeans_weighted, score_kmeans
+
+GROUP_COLUMNS = ["Bagian/Fakultas"]
+GROUP_MODELS_FILE = "group_models.npz"
+MIN_ROWS = 10
+KEY_SEPARATOR = "\x1f"
+
+
+def _join_keys(keys):
+    """Satu string kunci per baris dari beberapa kolom kelompok."""
+    keys = keys.astype(str)
+    joined = keys.iloc[:, 0]
+    for col in keys.columns[1:]:
+        joined = joined + KEY_SEPARATOR + keys[col]
+    return joined.to_numpy()
+
+
+def fit_group(features, k_range, n_clusters=None, random_state=42, silhouette_sample_size=None):
+    """
+    Sweep K dan model final untuk satu kelompok. K dibatasi oleh jumlah titik unik kelompok.
+    Mengembalikan None jika kelompok tidak dapat dikelompokkan (kurang dari 2 titik unik).
+    """
+    n_points = len(collapse_points(features)[0])
+    k_values = [k for k in k_range if k <= n_points and k < len(features)]
+    if not k_values:
+        return None
+
+    # Model setiap K disimpan agar model final untuk K terpilih tidak dilatih ulang
+    frame = pd.DataFrame(features, columns=FEATURE_COLUMNS)
+    models = {k: fit_kmeans_weighted(frame, n_clusters=k, random_state=random_state) for k in k_values}
+    sweep = [score_kmeans(frame, models[k], random_state, silhouette_sample_size) for k in k_values]
+    if n_clusters is not None:
+        k = min(n_clusters, n_points)
+    else:
+        # K dengan DBI terkecil (jika sama, K terkecil). K = jumlah titik unik tidak dipilih:
+        # setiap titik menjadi klaster sendiri sehingga DBI selalu 0.
+        scores = [row["DBI"] if row["K"] < n_points and not np.isnan(row["DBI"]) else np.inf for row in sweep]
+        k = k_values[int(np.argmin(scores))]
+
+    model = models[k] if k in models else fit_kmeans_weighted(frame, n_clusters=k, random_state=random_state)
+    selected = next((row for row in sweep if row["K"] == k), None)
+    return {
+        "sweep": sweep,
+        "K": k,
+        "centroids": np.asarray(model.cluster_centers_, dtype=float),
+        "table": CellTablePredictor(model).table,
+        "SSE": float(model.inertia_),
+        "DBI": selected["DBI"] if selected else np.nan,
+    }
+
+
+def _fit_group_task(spec, start, stop, k_range, n_clusters, random_state, silhouette_sample_size):
+    # Dijalankan di proses pekerja: fitur kelompok dibaca langsung dari shared memory
+    with SharedArray.attach(spec) as shared:
+        return fit_group(shared.array[start:stop], k_range, n_clusters, random_state, silhouette_sample_size)
+
+
+def fit_grouped(data, group_columns=GROUP_COLUMNS, k_range=range(2, 12), n_clusters=None, min_rows=MIN_ROWS,
+                random_state=42, n_jobs=None, silhouette_sample_size=None):
+    """
+    Melatih satu model K-Means per kelompok `group_columns` secara paralel.
+    Kelompok dengan kurang dari `min_rows` baris tidak dilatih (memakai model cadangan saat penilaian).
+    `n_jobs=1` menjalankan semua kelompok di proses ini.
+    Mengembalikan (GroupModels, tabel sweep per kelompok dan K).
+    """
+    group_columns = list(group_columns)
+    data = data.dropna(subset=group_columns + FEATURE_COLUMNS)
+    codes, uniques = pd.factorize(_join_keys(data[group_columns]))
+    key_frame = data[group_columns].drop_duplicates().astype(str)
+    key_by_code = dict(zip(_join_keys(key_frame), key_frame.itertuples(index=False, name=None)))
+
+    # Urutkan per kelompok sehingga setiap kelompok menjadi potongan kontigu
+    order = np.argsort(codes, kind="stable")
+    features = data[FEATURE_COLUMNS].to_numpy(dtype=float)[order]
+    sizes = np.bincount(codes, minlength=len(uniques))
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+    # Kelompok terbesar dikerjakan lebih dulu agar beban pekerja seimbang
+    groups = [g for g in np.argsort(-sizes, kind="stable") if sizes[g] >= min_rows]
+
+    args = (list(k_range), n_clusters, random_state, silhouette_sample_size)
+    if n_jobs == 1 or len(groups) <= 1:
+        results = [fit_group(features[offsets[g]:offsets[g + 1]], *args) for g in groups]
+    else:
+        with SharedArray.from_array(features) as shared:
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                futures = [
+                    executor.submit(_fit_group_task, shared.spec, offsets[g], offsets[g + 1], *args) for g in groups
+                ]
+                results = [future.result() for future in futures]
+
+    keys, centroids, tables, n_rows, sse, dbi = [], [], [], [], [], []
+    sweep_rows = []
+    for g, result in zip(groups, results):
+        if result is None:
+            continue
+        key = key_by_code[uniques[g]]
+        keys.append(key)
+        centroids.append(result["centroids"])
+        tables.append(result["table"])
+        n_rows.append(int(sizes[g]))
+        sse.append(result["SSE"])
+        dbi.append(result["DBI"])
+        for row in result["sweep"]:
+            sweep_rows.append({**dict(zip(group_columns, key)), **row, "Dipilih": row["K"] == result["K"]})
+
+    models = GroupModels(group_columns, keys, centroids, tables, n_rows=n_rows, sse=sse, dbi=dbi)
+    sweep = pd.DataFrame(sweep_rows, columns=[*group_columns, "K", "seed", "SSE", "DBI", "Silhouette", "n_iter", "Dipilih"])
+    return models, sweep
+
+
+class GroupModels:
+    """Registry model per kelompok: centroid dan tabel klaster per sel untuk setiap kunci kelompok."""
+    def __init__(self, group_columns, keys, centroids, tables, n_rows=None, sse=None, dbi=None):
+        self.group_columns = list(group_columns)
+        self.keys = [tuple(str(value) for value in key) for key in keys]
+        self.centroids = [np.asarray(c, dtype=float).reshape(-1, len(FEATURE_COLUMNS)) for c in centroids]
+        self.tables = np.asarray(tables, dtype=np.int64).reshape(len(self.keys), N_P, N_K)
+        n_groups = len(self.keys)
+        self.n_rows = np.asarray(n_rows if n_rows is not None else np.zeros(n_groups), dtype=np.int64)
+        self.sse = np.asarray(sse if sse is not None else np.full(n_groups, np.nan), dtype=float)
+        self.dbi = np.asarray(dbi if dbi is not None else np.full(n_groups, np.nan), dtype=float)
+
+        self._index = pd.Index([KEY_SEPARATOR.join(key) for key in self.keys])
+        # Centroid dalam satu array (kelompok x K maksimum x fitur); slot kosong berjarak tak hingga
+        k_max = max((len(c) for c in self.centroids), default=0)
+        self._padded = np.full((n_groups, k_max, len(FEATURE_COLUMNS)), np.inf)
+        for g, c in enumerate(self.centroids):
+            self._padded[g, :len(c)] = c
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def n_clusters(self):
+        return np.array([len(c) for c in self.centroids], dtype=np.int64)
+
+    def group_index(self, data):
+        """Indeks model untuk setiap baris `data` (-1 jika kelompoknya tidak memiliki model)."""
+        missing = data[self.group_columns].isna().any(axis=1).to_numpy()
+        index = self._index.get_indexer(_join_keys(data[self.group_columns]))
+        index[missing] = -1
+        return index
+
+    def predict_cells(self, group_index, p_num, k_num, fallback=None):
+        """
+        Klaster setiap baris dari model kelompoknya dalam satu operasi vektor.
+        Nilai di luar grid memakai centroid terdekat pada kelompok tersebut. Baris tanpa model
+        diprediksi oleh `fallback` (objek dengan `predict_cells`), atau -1 jika tidak ada.
+        """
+        g = np.asarray(group_index, dtype=np.intp).ravel()
+        p = np.asarray(p_num, dtype=float).ravel()
+        k = np.asarray(k_num, dtype=float).ravel()
+
+        known = g >= 0
+        in_grid = known & (p == np.round(p)) & (k == np.round(k)) & (p >= 1) & (p <= N_P) & (k >= 1) & (k <= N_K)
+        labels = np.full(p.shape, -1, dtype=np.int64)
+        labels[in_grid] = self.tables[g[in_grid], p[in_grid].astype(np.intp) - 1, k[in_grid].astype(np.intp) - 1]
+
+        outside = known & ~in_grid
+        if outside.any():
+            points = np.column_stack([p[outside], k[outside]])
+            distances = ((self._padded[g[outside]] - points[:, np.newaxis, :]) ** 2).sum(axis=2)
+            labels[outside] = distances.argmin(axis=1)
+        if fallback is not None and not known.all():
+            labels[~known] = fallback.predict_cells(p[~known], k[~known])
+        return labels
+
+    def predict(self, data, fallback=None):
+        """Klaster per kelompok untuk DataFrame dengan kolom kelompok, P_num, dan K_num."""
+        return self.predict_cells(
+            self.group_index(data), data[FEATURE_COLUMNS[0]].to_numpy(), data[FEATURE_COLUMNS[1]].to_numpy(),
+            fallback=fallback,
+        )
+
+    def summary(self):
+        """Ringkasan per kelompok: jumlah data, K, SSE, dan DBI."""
+        summary = pd.DataFrame(self.keys, columns=self.group_columns)
+        summary["Jumlah Data"] = self.n_rows
+        summary["K"] = self.n_clusters
+        summary["SSE"] = self.sse
+        summary["DBI"] = self.dbi
+        return summary
+
+    # --- Simpan / Muat ---
+    def save(self, path=GROUP_MODELS_FILE):
+        np.savez(
+            path,
+            group_columns=np.array(self.group_columns),
+            keys=np.array(self.keys, dtype=str).reshape(len(self.keys), len(self.group_columns)),
+            n_clusters=self.n_clusters,
+            centroids=np.concatenate(self.centroids) if self.centroids else np.empty((0, len(FEATURE_COLUMNS))),
+            tables=self.tables,
+            n_rows=self.n_rows,
+            sse=self.sse,
+            dbi=self.dbi,
+        )
+
+    @classmethod
+    def load(cls, path=GROUP_MODELS_FILE):
+        with np.load(path, allow_pickle=False) as artifact:
+            splits = np.cumsum(artifact["n_clusters"])[:-1]
+            return cls(
+                artifact["group_columns"].tolist(),
+                [tuple(key) for key in artifact["keys"].tolist()],
+                np.split(artifact["centroids"], splits),
+                artifact["tables"],
+                n_rows=artifact["n_rows"], sse=artifact["sse"], dbi=artifact["dbi"],
+            )
@@ -0,0 +1,268 @@
+"""
+Pelatihan K-Means out-of-core untuk riwayat KPI beberapa periode.
+
+File per periode (CSV/XLSX) dibaca per chunk, setiap chunk dijalankan melalui pipeline
+preprocessing yang sudah di-fit (mode kolumnar bila tersedia), lalu fitur P_num/K_num diringkas
+menjadi titik unik berbobot dan diteruskan ke `MiniBatchKMeans.partial_fit` (satu langkah
+mini-batch per chunk). Memori yang dipakai hanya sebesar satu chunk, berapa pun jumlah periodenya.
+
+Keadaan pelatihan disimpan ke file checkpoint (ditulis ke file sementara lalu `os.replace`) setiap
+`checkpoint_every` chunk dan di akhir setiap file; menjalankan `fit` lagi dengan checkpoint yang
+sama melanjutkan dari chunk berikutnya. Jika `n_epochs=1`, file periode baru dapat ditambahkan di
+akhir daftar dan hanya file baru tersebut yang dilatih.
+
+Histogram titik unik seluruh riwayat (paling banyak 20 titik) ikut dikumpulkan, sehingga model
+full-batch pembanding dan laporan inertia/DBI dihitung tanpa membaca ulang data.
+
+    trainer = IncrementalTrainer(6, pipeline_preprocessing, checkpoint_path="kmeans_minibatch.ckpt")
+    model = trainer.fit(["DATA KPI 2023.xlsx", "DATA KPI 2024.xlsx"])
+    print(trainer.report())
+    trainer.save_model("kmeans_model.pkl")
+"""
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy.optimize import linear_sum_assignment
+from sklearn.cluster import MiniBatchKMeans
+
+from banding import add_bands
+from columnar import FEATURE_COLUMNS as BLOCK_COLUMNS, preprocess_columnar, supports_columnar
+from evaluation import ClusterStats
+from ingest import CHUNK_SIZE, read_upload_chunks
+from training import FEATURE_COLUMNS, collapse_points, fit_kmeans_points
+
+TRAINING_COLUMNS = ["Nama Pegawai", "Bagian/Fakultas", "Nilai P", "Nilai K"]
+CHECKPOINT_VERSION = 1
+
+
+def chunk_features(chunk, preprocessing_pipeline):
+    """
+    Banding dan preprocessing satu chunk; mengembalikan fitur P_num/K_num (array n x 2).
+    Duplikat hanya dihapus di dalam chunk yang sama.
+    """
+    chunk = add_bands(chunk)
+    # Data dengan Nilai K di luar kategori tidak ikut dilatih
+    valid_k = (chunk["K_num"] != 0).to_numpy()
+    if supports_columnar(preprocessing_pipeline):
+        _, block = preprocess_columnar(chunk, preprocessing_pipeline, row_mask=valid_k)
+        return block[:, [BLOCK_COLUMNS.index(col) for col in FEATURE_COLUMNS]]
+    chunk = preprocessing_pipeline.transform(chunk[valid_k])
+    return chunk[FEATURE_COLUMNS].to_numpy(dtype=float)
+
+
+def merge_histograms(points, counts, new_points, new_counts):
+    """Menggabungkan dua histogram titik unik (titik, jumlah baris)."""
+    merged, _, inverse = collapse_points(np.vstack([points, new_points]))
+    return merged, np.bincount(inverse, weights=np.concatenate([counts, new_counts]))
+
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+
+
+class IncrementalTrainer:
+    """MiniBatchKMeans yang dilatih per chunk dari beberapa file periode, dengan checkpoint dan resume."""
+    def __init__(self, n_clusters, preprocessing_pipeline, checkpoint_path=None, random_state=42,
+                 n_epochs=1, checkpoint_every=1, chunksize=CHUNK_SIZE, **minibatch_params):
+        self.n_clusters = n_clusters
+        self.preprocessing_pipeline = preprocessing_pipeline
+        self.checkpoint_path = checkpoint_path
+        self.random_state = random_state
+        self.n_epochs = n_epochs
+        self.checkpoint_every = checkpoint_every
+        self.chunksize = chunksize
+        self.model = MiniBatchKMeans(
+            n_clusters=n_clusters, random_state=random_state, compute_labels=False, **minibatch_params
+        )
+
+        self.files = []
+        self.position = (0, 0, 0)  # (epoch, indeks file, indeks chunk) yang akan dilatih berikutnya
+        self.points = np.empty((0, len(FEATURE_COLUMNS)))
+        self.counts = np.zeros(0)
+        self.n_rows = 0
+        self.n_chunks = 0
+        self.resumed = False
+        self._pending = None  # Titik yang ditahan sampai jumlah titik unik cukup untuk inisialisasi
+        self._reference = None
+
+    # --- Pelatihan ---
+    def _partial_fit(self, features, first_epoch):
+        points, counts, _ = collapse_points(features)
+        if first_epoch:
+            # Histogram seluruh riwayat hanya dikumpulkan pada epoch pertama
+            self.points, self.counts = merge_histograms(self.points, self.counts, points, counts)
+            self.n_rows += int(counts.sum())
+            self._reference = None
+        self.n_chunks += 1
+        if not hasattr(self.model, "cluster_centers_"):
+            # partial_fit pertama membutuhkan minimal n_clusters titik untuk inisialisasi k-means++
+            if self._pending is not None:
+                points, counts = merge_histograms(*self._pending, points, counts)
+            if len(points) < self.n_clusters:
+                self._pending = (points, counts)
+                return
+            self._pending = None
+        if len(points):
+            self.model.partial_fit(pd.DataFrame(points, columns=FEATURE_COLUMNS), sample_weight=counts)
+
+    def fit(self, paths):
+        """
+        Melatih model dari daftar file periode (berurutan). Jika checkpoint ada, pelatihan
+        dilanjutkan dari posisi terakhir. Mengembalikan model MiniBatchKMeans.
+        """
+        paths = [os.fspath(path) for path in paths]
+        files = [_file_signature(path) for path in paths]
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            self._load_checkpoint(files)
+        self.files = files
+
+        epoch, file_index, chunk_index = self.position
+        since_checkpoint = 0
+        while epoch < self.n_epochs:
+            while file_index < len(paths):
+                path = paths[file_index]
+                with open(path, "rb") as handle:
+                    chunks = read_upload_chunks(handle, path.lower(), self.chunksize, TRAINING_COLUMNS)
+                    for index, chunk in enumerate(chunks):
+                        if index < chunk_index:
+                            continue  # Sudah dilatih sebelum checkpoint terakhir
+                        self._partial_fit(chunk_features(chunk, self.preprocessing_pipeline), epoch == 0)
+                        self.position = (epoch, file_index, index + 1)
+                        since_checkpoint += 1
+                        if since_checkpoint >= self.checkpoint_every:
+                            self.save_checkpoint()
+                            since_checkpoint = 0
+                file_index, chunk_index = file_index + 1, 0
+                self.position = (epoch, file_index, 0)
+                self.save_checkpoint()
+                since_checkpoint = 0
+            epoch, file_index = epoch + 1, 0
+            self.position = (epoch, 0, 0)
+
+        if not hasattr(self.model, "cluster_centers_"):
+            raise ValueError(
+                f"Jumlah titik unik ({len(self.points)}) lebih sedikit dari jumlah klaster ({self.n_clusters})."
+            )
+        # Inertia model dihitung pada seluruh riwayat, seperti `inertia_` pada KMeans
+        self.model.inertia_ = self.history_stats(self.model).sse(self.model.cluster_centers_)
+        self.save_checkpoint()
+        return self.model
+
+    # --- Checkpoint ---
+    def _state(self):
+        return {
+            "version": CHECKPOINT_VERSION,
+            "params": self._params(),
+            "files": self.files,
+            "position": self.position,
+            "model": self.model,
+            "points": self.points,
+            "counts": self.counts,
+            "n_rows": self.n_rows,
+            "n_chunks": self.n_chunks,
+            "pending": self._pending,
+        }
+
+    def _params(self):
+        return {"n_clusters": self.n_clusters, "random_state": self.random_state, "n_epochs": self.n_epochs,
+                "chunksize": self.chunksize}
+
+    def save_checkpoint(self):
+        """Menyimpan keadaan pelatihan secara atomik (file sementara lalu `os.replace`)."""
+        if not self.checkpoint_path:
+            return
+        temp_path = self.checkpoint_path + ".tmp"
+        with open(temp_path, "wb") as handle:
+            joblib.dump(self._state(), handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_path, self.checkpoint_path)
+
+    def _load_checkpoint(self, files):
+        state = joblib.load(self.checkpoint_path)
+        if state.get("version") != CHECKPOINT_VERSION or state["params"] != self._params():
+            raise ValueError("Checkpoint dibuat dengan parameter pelatihan lain; hapus checkpoint untuk memulai ulang.")
+
+        # File yang sudah dilatih tidak boleh berubah; file periode baru hanya boleh ditambahkan di akhir
+        previous = [tuple(signature) for signature in state["files"]]
+        appended = len(files) > len(previous)
+        if files[:len(previous)] != previous or len(files) < len(previous) or (appended and self.n_epochs != 1):
+            raise ValueError("File pelatihan berbeda dengan checkpoint; hapus checkpoint untuk memulai ulang.")
+
+        self.position = tuple(state["position"])
+        if appended and self.position[0] >= self.n_epochs:
+            self.position = (0, len(previous), 0)
+        self.model = state["model"]
+        self.points, self.counts = state["points"], state["counts"]
+        self.n_rows, self.n_chunks = state["n_rows"], state["n_chunks"]
+        self._pending = state["pending"]
+        self._reference = None
+        self.resumed = True
+
+    # --- Evaluasi ---
+    def history_stats(self, model):
+        """Statistik klaster `model` pada seluruh riwayat (dari histogram titik unik)."""
+        labels = model.predict(pd.DataFrame(self.points, columns=FEATURE_COLUMNS))
+        return ClusterStats.from_data(self.points, labels, n_clusters=model.n_clusters, sample_weight=self.counts)
+
+    def reference_model(self):
+        """K-Means full-batch pada histogram seluruh riwayat (pembanding), dilatih sekali."""
+        if self._reference is None:
+            self._reference = fit_kmeans_points(self.points, self.counts, self.n_clusters, self.random_state)
+        return self._reference
+
+    def report(self, models=None):
+        """
+        Membandingkan model MiniBatch dengan K-Means full-batch pada data yang sama
+        (dan model lain pada `models`, misalnya {"kmeans_model.pkl": kmeans}).
+        """
+        models = {"K-Means full-batch": self.reference_model(), "MiniBatchKMeans": self.model, **(models or {})}
+        return compare_models(self.points, self.counts, models)
+
+    def save_model(self, path="kmeans_model.pkl"):
+        """Menyimpan model sebagai pengganti langsung `kmeans_model.pkl` (predict, cluster_centers_)."""
+        joblib.dump(self.model, path)
+
+
+def compare_models(points, counts, models):
+    """
+    Inertia, DBI, dan kesesuaian setiap model terhadap model pertama pada histogram titik unik.
+    Klaster dipasangkan berdasarkan jarak centroid (linear_sum_assignment), karena nomor klaster
+    antar model tidak harus sama.
+    """
+    points = np.asarray(points, dtype=float)
+    counts = np.asarray(counts, dtype=float)
+    frame = pd.DataFrame(points, columns=FEATURE_COLUMNS)
+
+    rows = []
+    reference = None
+    for name, model in models.items():
+        labels = model.predict(frame)
+        centers = np.asarray(model.cluster_centers_, dtype=float)
+        stats = ClusterStats.from_data(points, labels, n_clusters=len(centers), sample_weight=counts)
+        inertia = stats.sse(centers)
+        row = {
+            "Model": name,
+            "Jumlah Data": int(counts.sum()),
+            "Inertia (SSE)": inertia,
+            "DBI": stats.davies_bouldin() if (stats.counts > 0).sum() >= 2 else np.nan,
+        }
+        if reference is None:
+            reference = (centers, labels, inertia)
+            row.update({"Selisih Inertia (%)": 0.0, "Pergeseran Centroid Maks": 0.0, "Kesesuaian Label (%)": 100.0})
+        else:
+            ref_centers, ref_labels, ref_inertia = reference
+            distances = np.sqrt(((ref_centers[:, np.newaxis, :] - centers[np.newaxis, :, :]) ** 2).sum(axis=2))
+            ref_index, index = linear_sum_assignment(distances)
+            mapping = np.full(len(centers), -1)
+            mapping[index] = ref_index
+            row.update({
+                "Selisih Inertia (%)": (inertia - ref_inertia) / ref_inertia * 100 if ref_inertia else np.nan,
+                "Pergeseran Centroid Maks": float(distances[ref_index, index].max()),
+                "Kesesuaian Label (%)": counts[mapping[labels] == ref_labels].sum() / counts.sum() * 100,
+            })
+        rows.append(row)
+    return pd.DataFrame(rows)
@@ -0,0 +1,208 @@
+"""
+Pembacaan dan pengelompokan file unggahan secara bertahap (per chunk).
+
+File CSV/XLSX dibaca per `CHUNK_SIZE` baris dan hanya kolom yang dibutuhkan (dengan tipe data
+yang sudah ditentukan). Setiap chunk diproses preprocessing -> prediksi klaster -> kategori,
+lalu langsung ditulis ke file CSV hasil, sehingga pemakaian memori tidak bergantung pada ukuran file.
+"""
+import os
+
+import pandas as pd
+
+from banding import add_bands
+from columnar import score_columnar, supports_columnar
+from profiling import stage, transform_steps
+from schema import apply_schema
+
+REQUIRED_COLUMNS = ["NIP", "Nama Pegawai", "Bagian/Fakultas", "Nilai P", "Nilai K"]
+UPLOAD_DTYPES = {
+    "NIP": "string",
+    "Nama Pegawai": "string",
+    "Bagian/Fakultas": "category",
+    "Nilai P": "float64",
+    "Nilai K": "float64",
+}
+# Kolom file hasil (Hasil_Kelompokkan.csv) beserta nama kolom setelah diubah
+DOWNLOAD_COLUMNS = {
+    "NIP": "NIP",
+    "Nama Pegawai": "Nama",
+    "Bagian/Fakultas": "Unit",
+    "Cluster": "Cluster",
+    "Nilai Kinerja": "Nilai Kinerja",
+}
+
+CHUNK_SIZE = 50_000
+# File yang lebih besar dari batas ini diproses dengan mode streaming
+STREAMING_THRESHOLD_BYTES = int(os.environ.get("SIKERJA_STREAMING_THRESHOLD_MB", "20")) * 1024 * 1024
+
+
+def _missing_columns(header, columns=REQUIRED_COLUMNS):
+    return [col for col in columns if col not in header]
+
+
+def read_csv_chunks(file, chunksize=CHUNK_SIZE, columns=REQUIRED_COLUMNS):
+    """Membaca CSV per chunk, hanya kolom `columns` dengan tipe data yang ditentukan."""
+    header = pd.read_csv(file, nrows=0).columns
+    file.seek(0)
+
+    # Nama kolom dibandingkan setelah spasi tambahan dihapus
+    raw_names = {str(col).strip(): col for col in header}
+    missing = _missing_columns(raw_names, columns)
+    if missing:
+        raise ValueError(f"File harus memiliki kolom: {', '.join(missing)}")
+
+    reader = pd.read_csv(
+        file,
+        usecols=[raw_names[col] for col in columns],
+        dtype={raw_names[col]: UPLOAD_DTYPES[col] for col in columns},
+        chunksize=chunksize,
+    )
+    rename = {raw_names[col]: col for col in columns}
+    for chunk in reader:
+        yield chunk.rename(columns=rename)[columns]
+
+
+def read_xlsx_chunks(file, chunksize=CHUNK_SIZE, columns=REQUIRED_COLUMNS):
+    """Membaca sheet pertama XLSX baris demi baris (openpyxl read-only) dan mengelompokkannya per chunk."""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(col).strip() if col is not None else "" for col in next(rows, ())]
+        missing = _missing_columns(header, columns)
+        if missing:
+            raise ValueError(f"File harus memiliki kolom: {', '.join(missing)}")
+        positions = [header.index(col) for col in columns]
+        dtypes = {col: UPLOAD_DTYPES[col] for col in columns}
+
+        buffer = []
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            buffer.append([row[pos] if pos < len(row) else None for pos in positions])
+            if len(buffer) == chunksize:
+                yield pd.DataFrame(buffer, columns=columns).astype(dtypes)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=columns).astype(dtypes)
+    finally:
+        workbook.close()
+
+
+def read_upload_chunks(file, file_name, chunksize=CHUNK_SIZE, columns=REQUIRED_COLUMNS):
+    """Memilih pembaca chunk sesuai format file (CSV atau XLSX)."""
+    if file_name.endswith(".csv"):
+        return read_csv_chunks(file, chunksize, columns)
+    if file_name.endswith(".xlsx"):
+        return read_xlsx_chunks(file, chunksize, columns)
+    raise ValueError("Format file tidak didukung. Unggah file dalam format CSV atau Excel.")
+
+
+def score_chunk(chunk, preprocessing_pipeline, cluster_predictor, clustering_pipeline, deduplicator=None):
+    """
+    Menjalankan banding, preprocessing, prediksi klaster, dan kategori untuk satu chunk.
+    Mengembalikan (hasil, fitur P_num/K_num setelah preprocessing untuk statistik klaster).
+    `deduplicator` (UploadDeduplicator) bila diberikan membuang data yang sudah pernah diunggah.
+    """
+    with stage("banding", rows_in=len(chunk)):
+        chunk = add_bands(chunk)
+
+    # Data dengan Nilai K di luar kategori tidak ikut dikelompokkan
+    valid_k = (chunk["K_num"] != 0).to_numpy()
+    if deduplicator is not None:
+        with stage("deduplikasi", rows_in=int(valid_k.sum())) as record:
+            valid_k = deduplicator.filter(chunk, valid_k & chunk.notna().all(axis=1).to_numpy())
+            record.rows_out = int(valid_k.sum())
+    if supports_columnar(preprocessing_pipeline) and hasattr(cluster_predictor, "categorize"):
+        with stage("skema", rows_in=len(chunk)):
+            chunk = apply_schema(chunk)
+        return score_columnar(chunk, preprocessing_pipeline, cluster_predictor, row_mask=valid_k)
+
+    chunk = chunk[valid_k]
+    if chunk.empty:
+        chunk = chunk.assign(**{"Cluster": 0, "Nilai Kinerja": ""})
+        return chunk, chunk[["P_num", "K_num"]].to_numpy(dtype=float)
+
+    chunk = transform_steps(preprocessing_pipeline, chunk)
+    with stage("prediksi_klaster", rows_in=len(chunk)):
+        chunk["Cluster"] = cluster_predictor.predict_cells(chunk["P_num"], chunk["K_num"])
+    chunk = transform_steps(clustering_pipeline, chunk)
+    return chunk, chunk[["P_num", "K_num"]].to_numpy(dtype=float)
+
+
+def score_upload(file, file_name, preprocessing_pipeline, cluster_predictor, clustering_pipeline,
+                 chunksize=CHUNK_SIZE, deduplicator=None):
+    """
+    Generator: untuk setiap chunk menghasilkan (jumlah baris dibaca, jumlah baris tanpa nilai kosong,
+    DataFrame hasil pengelompokan, fitur P_num/K_num setelah preprocessing).
+    """
+    chunks = read_upload_chunks(file, file_name, chunksize)
+    while True:
+        with stage("baca_file") as record:
+            chunk = next(chunks, None)
+            record.rows_out = 0 if chunk is None else len(chunk)
+        if chunk is None:
+            return
+        # Baris dengan nilai kosong dibuang oleh preprocessing; di sini hanya dihitung
+        n_valid = int(chunk.notna().all(axis=1).sum())
+        scored, features = score_chunk(
+            chunk, preprocessing_pipeline, cluster_predictor, clustering_pipeline, deduplicator
+        )
+        yield len(chunk), n_valid, scored, features
+
+
+def _nip_hashes(chunk):
+    nip = chunk["NIP"].dropna().astype("string").str.strip()
+    return pd.util.hash_array(nip.to_numpy(dtype=object))
+
+
+def process_upload_streaming(file, file_name, preprocessing_pipeline, cluster_predictor, clustering_pipeline,
+                             output, chunksize=CHUNK_SIZE, preview_rows=1000, cluster_stats=None,
+                             deduplicator=None):
+    """
+    Memproses file unggahan per chunk dan menulis hasilnya ke `output` (file teks CSV) secara bertahap.
+
+    Mengembalikan ringkasan: total data awal, total data setelah preprocessing, total data dihapus,
+    jumlah NIP yang muncul lebih dari sekali, dan cuplikan hasil (maksimal `preview_rows` baris).
+    `cluster_stats` (ClusterStats) bila diberikan diperbarui dengan setiap chunk.
+    `deduplicator` (UploadDeduplicator) bila diberikan membuang duplikat antarunggahan; sidik jari
+    unggahan ini baru disimpan setelah semua chunk selesai diproses.
+    """
+    pd.DataFrame(columns=list(DOWNLOAD_COLUMNS.values())).to_csv(output, index=False)
+
+    total_awal = total_setelah = 0
+    preview = []
+    preview_count = 0
+    # NIP yang sudah terlihat (hash 64-bit) untuk mendeteksi NIP tidak unik antarchunk
+    seen_nip, duplicate_nip = set(), set()
+    for n_rows, n_valid, scored, features in score_upload(
+        file, file_name, preprocessing_pipeline, cluster_predictor, clustering_pipeline, chunksize, deduplicator
+    ):
+        total_awal += n_rows
+        total_setelah += n_valid
+        for nip in _nip_hashes(scored).tolist():
+            if nip in seen_nip:
+                duplicate_nip.add(nip)
+            seen_nip.add(nip)
+
+        with stage("ekspor_csv", rows_in=len(scored)):
+            scored[list(DOWNLOAD_COLUMNS)].rename(columns=DOWNLOAD_COLUMNS).to_csv(output, index=False, header=False)
+        if cluster_stats is not None and not scored.empty:
+            with stage("statistik_klaster", rows_in=len(scored)):
+                cluster_stats.update(features, scored["Cluster"])
+        if preview_count < preview_rows:
+            preview.append(scored.head(preview_rows - preview_count))
+            preview_count += len(preview[-1])
+
+    if deduplicator is not None:
+        with stage("simpan_sidik_jari"):
+            deduplicator.commit()
+    return {
+        **(deduplicator.report() if deduplicator is not None else {}),
+        "total_awal": total_awal,
+        "total_setelah": total_setelah,
+        "total_dihapus": total_awal - total_setelah,
+        "nip_tidak_unik": len(duplicate_nip),
+        "preview": pd.concat(preview, ignore_index=True) if preview else pd.DataFrame(),
+    }
@@ -0,0 +1,51 @@
+"""
+Batas winsorize per kolom dan penerapannya dengan satu `np.clip`.
+
+`winsorize_bounds` menghasilkan batas yang sama dengan `scipy.stats.mstats.winsorize`
+(limits bawah/atas, inklusif): nilai terkecil sebanyak `int(limit_bawah * n)` diganti dengan
+nilai berikutnya, dan nilai terbesar sebanyak `int(limit_atas * n)` diganti dengan nilai sebelumnya.
+"""
+import numpy as np
+
+
+def winsorize_bounds(values, limits=(0.01, 0.01)):
+    """Batas bawah dan atas setiap kolom dari array 2D (NaN diabaikan)."""
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 1:
+        values = values[:, np.newaxis]
+    low_limit, up_limit = limits
+    n_columns = values.shape[1]
+
+    lower = np.full(n_columns, -np.inf)
+    upper = np.full(n_columns, np.inf)
+    if values.shape[0] == 0:
+        return lower, upper
+
+    ordered = np.sort(values, axis=0)  # NaN berada di akhir
+    counts = (~np.isnan(values)).sum(axis=0)
+    columns = np.flatnonzero(counts > 0)
+    n = counts[columns]
+    if low_limit:
+        lower[columns] = ordered[(low_limit * n).astype(np.int64), columns]
+    if up_limit:
+        upper[columns] = ordered[n - (n * up_limit).astype(np.int64) - 1, columns]
+    return lower, upper
+
+
+def clip_columns(X, columns, lower, upper):
+    """
+    Memotong kolom `columns` pada DataFrame `X` (in-place) dengan satu `np.clip`.
+    Kolom bilangan bulat dikembalikan ke tipe aslinya jika hasilnya tetap bulat.
+    """
+    if not columns:
+        return X
+    dtypes = X[columns].dtypes
+    clipped = np.clip(X[columns].to_numpy(dtype=float), lower, upper)
+    integral = np.all(clipped == np.round(clipped), axis=0)
+
+    for position, col in enumerate(columns):
+        values = clipped[:, position]
+        if np.issubdtype(dtypes[col], np.integer) and integral[position]:
+            values = values.astype(dtypes[col])
+        X[col] = values
+    return X
@@ -0,0 +1,78 @@
+"""
+Tabel berhalaman (server-side) untuk tampilan dataset.
+
+Filter (unit, kategori, klaster), pengurutan, dan pemotongan halaman dilakukan di server;
+yang dikirim ke browser hanya baris pada halaman yang terlihat, sehingga ukuran data per rerun
+tetap walaupun jumlah pegawai bertambah.
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+FILTER_COLUMNS = ["Bagian/Fakultas", "Nilai Kinerja", "Cluster"]
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+def filter_positions(data, filters=None):
+    """
+    Posisi baris yang lolos filter.
+    `filters`: dict kolom -> daftar nilai yang diizinkan (daftar kosong berarti tanpa filter).
+    """
+    positions = np.arange(len(data))
+    for col, values in (filters or {}).items():
+        if values and col in data.columns:
+            positions = positions[data[col].iloc[positions].isin(values).to_numpy()]
+    return positions
+
+
+def page_rows(data, positions, sort_by=None, ascending=True, offset=0, limit=50):
+    """Mengurutkan `positions` berdasarkan `sort_by` (stabil, nilai kosong di akhir) lalu mengambil satu halaman."""
+    if sort_by in data.columns and len(positions):
+        keys = pd.Series(data[sort_by].to_numpy()[positions])
+        order = keys.sort_values(ascending=ascending, kind="stable", na_position="last").index.to_numpy()
+        positions = positions[order]
+    return data.iloc[positions[offset:offset + limit]]
+
+
+def query_page(data, filters=None, sort_by=None, ascending=True, offset=0, limit=50):
+    """Filter, urutkan, dan ambil satu halaman. Mengembalikan (DataFrame halaman, jumlah baris yang cocok)."""
+    positions = filter_positions(data, filters)
+    return page_rows(data, positions, sort_by, ascending, offset, limit), len(positions)
+
+
+def _options(data, col):
+    values = pd.Series(data[col].dropna().unique())
+    return sorted(values.tolist(), key=lambda value: (isinstance(value, str), value))
+
+
+def paginated_table(data, key, filter_columns=FILTER_COLUMNS, page_size=50):
+    """Menampilkan `data` sebagai tabel berhalaman dengan filter, pengurutan, dan navigasi halaman."""
+    filter_columns = [col for col in filter_columns if col in data.columns]
+    filters = {}
+    with st.expander("Filter dan Urutkan"):
+        for col in filter_columns:
+            filters[col] = st.multiselect(col, _options(data, col), key=f"{key}_filter_{col}")
+        sort_col, order_col, size_col = st.columns([2, 1, 1])
+        sort_by = sort_col.selectbox("Urutkan berdasarkan", ["(urutan data)", *data.columns], key=f"{key}_sort")
+        ascending = order_col.radio("Arah", ["Naik", "Turun"], key=f"{key}_order", horizontal=True) == "Naik"
+        page_size = size_col.selectbox(
+            "Baris per halaman", PAGE_SIZES, index=PAGE_SIZES.index(page_size) if page_size in PAGE_SIZES else 1,
+            key=f"{key}_size",
+        )
+
+    positions = filter_positions(data, filters)
+    n_matched = len(positions)
+    n_pages = max(1, -(-n_matched // page_size))
+    page_key = f"{key}_page"
+    if st.session_state.get(page_key, 1) > n_pages:
+        st.session_state[page_key] = 1  # Filter berubah: kembali ke halaman pertama
+    page = st.number_input(f"Halaman (dari {n_pages})", min_value=1, max_value=n_pages, step=1, key=page_key)
+
+    offset = (int(page) - 1) * page_size
+    rows = page_rows(data, positions, sort_by if sort_by in data.columns else None, ascending, offset, page_size)
+    st.dataframe(rows)
+    if n_matched:
+        st.caption(f"Menampilkan baris {offset + 1}–{offset + len(rows)} dari {n_matched} (total data: {len(data)}).")
+    else:
+        st.caption("Tidak ada data yang cocok dengan filter.")
+    return rows
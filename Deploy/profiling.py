@@ -0,0 +1,237 @@
+"""
+Instrumentasi per tahap untuk proses pengelompokan (parsing file, banding, preprocessing,
+prediksi, kategori, penggabungan, ekspor CSV).
+
+Aktif hanya jika environment variable `SIKERJA_PROFILE=1` (tracemalloc lalu aktif selama proses
+berjalan); jika tidak, `stage()` tidak melakukan apa pun. Setiap tahap mencatat waktu (wall time),
+jumlah baris masuk/keluar, dan puncak memori (tracemalloc) selama tahap tersebut. Tahap
+dikelompokkan per eksekusi (`run`); eksekusi terakhir dari sesi mana pun diekspor ke file JSON dan
+Prometheus text (`SIKERJA_PROFILE_PATH`, default `profile.json` dan `profile.prom`).
+
+Profiling hanya untuk satu pengguna (diagnosis), bukan untuk aplikasi yang dipakai bersamaan.
+tracemalloc berlaku untuk seluruh proses dan tidak dapat memisahkan alokasi per thread, sehingga
+tahap dari thread yang berbeda diserialkan dengan satu kunci agar reset puncak memori tidak saling
+menimpa: selama profiling aktif, sesi lain menunggu tahap yang sedang berjalan (aplikasi menampilkan
+peringatan di sidebar). Alokasi thread lain di luar tahap tetap ikut terhitung. Puncak tahap
+`total` adalah puncak terbesar dari tahap-tahapnya.
+
+    with profiler.run("clustering"):
+        with profiler.stage("banding", rows_in=len(df)) as record:
+            df = add_bands(df)
+            record.rows_out = len(df)
+"""
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+
+ENABLED = os.environ.get("SIKERJA_PROFILE", "0").lower() not in ("", "0", "false", "no")
+PROFILE_PATH = os.environ.get("SIKERJA_PROFILE_PATH", "profile.json")
+
+
+class StageRecord:
+    """Hasil pengukuran satu tahap."""
+    __slots__ = ("name", "depth", "seconds", "rows_in", "rows_out", "peak_bytes", "_start_memory", "_child_peak")
+
+    def __init__(self, name, depth, rows_in=None):
+        self.name = name
+        self.depth = depth
+        self.seconds = 0.0
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.peak_bytes = None
+        self._start_memory = 0
+        self._child_peak = 0
+
+    def as_dict(self):
+        return {
+            "stage": self.name,
+            "depth": self.depth,
+            "seconds": self.seconds,
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "peak_bytes": self.peak_bytes,
+        }
+
+
+class _NullRecord:
+    """Pengganti StageRecord saat profiling nonaktif (atribut diabaikan)."""
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_RECORD = _NullRecord()
+
+
+class Profiler:
+    """
+    Pencatat tahap per eksekusi. `finish_run` mengembalikan eksekusi milik thread pemanggil;
+    `last_run` berisi eksekusi terakhir yang selesai dari thread mana pun.
+    """
+    def __init__(self, enabled=ENABLED, path=PROFILE_PATH):
+        self.enabled = enabled
+        self.path = path
+        self.last_run = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Tahap (selain total) dari thread yang berbeda tidak boleh tumpang tindih: reset_peak berlaku global
+        self._stage_lock = threading.RLock()
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+            self._local.stages = None
+            self._local.run = None
+        return self._local.stack
+
+    # --- Eksekusi ---
+    def start_run(self, name):
+        """
+        Memulai eksekusi baru di thread ini (eksekusi sebelumnya yang belum selesai dibuang).
+        Dipakai di skrip Streamlit: `start_run` di awal rerun dan `finish_run` di akhir.
+        """
+        if not self.enabled:
+            return
+        stack = self._stack()
+        stack.clear()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._local.stages = []
+        self._local.run = {"run": name, "started": time.strftime("%Y-%m-%d %H:%M:%S")}
+        self._enter(StageRecord("total", 0))
+
+    def finish_run(self):
+        """Menyelesaikan eksekusi di thread ini, menyimpannya di `last_run`, dan mengekspornya."""
+        if not self.enabled or getattr(self._local, "run", None) is None:
+            return None
+        stack = self._stack()
+        while stack:
+            self._exit(stack[-1])
+        run = {**self._local.run, "stages": [record.as_dict() for record in self._local.stages]}
+        self._local.stages = None
+        self._local.run = None
+        with self._lock:
+            self.last_run = run
+        try:
+            self.export(run)
+        except OSError:
+            pass  # Direktori hanya-baca: hasil tetap tersedia di `last_run`
+        return run
+
+    @contextmanager
+    def run(self, name):
+        """Mengelompokkan tahap-tahap satu eksekusi; hasilnya diekspor setelah eksekusi selesai."""
+        self.start_run(name)
+        try:
+            yield
+        finally:
+            self.finish_run()
+
+    # --- Tahap ---
+    def _enter(self, record):
+        stack = self._stack()
+        record.depth = len(stack)
+        self._local.stages.append(record)
+        # Tahap total (depth 0) berjalan tanpa kunci dan tanpa reset_peak agar tidak mengganggu thread lain
+        if record.depth > 0:
+            self._stage_lock.acquire()
+            current, peak = tracemalloc.get_traced_memory()
+            if record.depth > 1:
+                # Puncak induk sebelum tahap ini dimulai disimpan sebelum peak di-reset
+                stack[-1]._child_peak = max(stack[-1]._child_peak, peak)
+            record._start_memory = current
+            tracemalloc.reset_peak()
+        stack.append(record)
+        record.seconds = time.perf_counter()
+
+    def _exit(self, record):
+        stack = self._stack()
+        record.seconds = time.perf_counter() - record.seconds
+        stack.pop()
+        if record.depth == 0:
+            # Puncak tahap total = puncak terbesar dari tahap-tahapnya
+            record.peak_bytes = record._child_peak
+            return
+        # Puncak tahap ini = puncak sejak reset terakhir atau puncak tahap anak (nilai absolut)
+        peak = max(tracemalloc.get_traced_memory()[1], record._child_peak)
+        record.peak_bytes = max(0, peak - record._start_memory)
+        parent = stack[-1]
+        parent._child_peak = max(parent._child_peak, peak if parent.depth > 0 else record.peak_bytes)
+        self._stage_lock.release()
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        """Mengukur satu tahap; atur `rows_out` pada objek yang dikembalikan."""
+        if not self.enabled or getattr(self._local, "stages", None) is None:
+            yield _NULL_RECORD
+            return
+        record = StageRecord(name, 0, rows_in)
+        self._enter(record)
+        try:
+            yield record
+        finally:
+            if record in self._local.stack:
+                self._exit(record)
+
+    # --- Ekspor ---
+    def frame(self, run=None):
+        """Eksekusi (default: terakhir) sebagai DataFrame, nama tahap diindentasi sesuai kedalaman."""
+        run = run or self.last_run
+        if not run:
+            return pd.DataFrame(columns=["Tahap", "Detik", "Baris Masuk", "Baris Keluar", "Puncak Memori (MB)"])
+        return pd.DataFrame({
+            "Tahap": ["  " * record["depth"] + record["stage"] for record in run["stages"]],
+            "Detik": [record["seconds"] for record in run["stages"]],
+            "Baris Masuk": [record["rows_in"] for record in run["stages"]],
+            "Baris Keluar": [record["rows_out"] for record in run["stages"]],
+            "Puncak Memori (MB)": [
+                record["peak_bytes"] / 2**20 if record["peak_bytes"] is not None else None for record in run["stages"]
+            ],
+        })
+
+    def prometheus_text(self, run=None):
+        """Eksekusi dalam format teks Prometheus (satu sampel per tahap dan metrik)."""
+        run = run or self.last_run
+        if not run:
+            return ""
+        metrics = [
+            ("sikerja_stage_seconds", "seconds", "Waktu per tahap (detik)"),
+            ("sikerja_stage_rows_in", "rows_in", "Jumlah baris masuk per tahap"),
+            ("sikerja_stage_rows_out", "rows_out", "Jumlah baris keluar per tahap"),
+            ("sikerja_stage_peak_bytes", "peak_bytes", "Puncak memori per tahap (byte)"),
+        ]
+        lines = []
+        for metric, key, description in metrics:
+            lines += [f"# HELP {metric} {description}", f"# TYPE {metric} gauge"]
+            for position, record in enumerate(run["stages"]):
+                if record[key] is None:
+                    continue
+                labels = f'run="{run["run"]}",stage="{record["stage"]}",position="{position}"'
+                lines.append(f"{metric}{{{labels}}} {record[key]}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, run=None):
+        """Menulis eksekusi ke `<path>.json` dan `<path>.prom`."""
+        run = run or self.last_run
+        base = os.path.splitext(self.path)[0]
+        with open(base + ".json", "w", encoding="utf-8") as handle:
+            json.dump(run, handle, indent=2)
+        with open(base + ".prom", "w", encoding="utf-8") as handle:
+            handle.write(self.prometheus_text(run))
+
+
+def transform_steps(pipeline, X, prefix=""):
+    """`pipeline.transform(X)` dengan satu tahap per langkah Pipeline."""
+    for name, step in pipeline.steps:
+        with profiler.stage(f"{prefix}{name}", rows_in=len(X)) as record:
+            X = step.transform(X)
+            record.rows_out = len(X)
+    return X
+
+
+profiler = Profiler()
+stage = profiler.stage
@@ -0,0 +1,149 @@
+"""
+Registry artefak model.
+
+Setiap artefak (.pkl) dimuat paling banyak sekali per proses, hanya ketika pertama kali
+dibutuhkan (lazy), dan objek yang sama dibagi ke semua sesi Streamlit (`st.cache_resource`).
+Registry juga mencatat metadata setiap artefak (ukuran, waktu modifikasi, hash SHA-256) dan
+menyediakan model ringan (`model_light.npz`) yang dibuat ulang otomatis bila `kmeans_model.pkl`
+atau tabel kategori berubah.
+"""
+import hashlib
+import os
+import threading
+import time
+
+import numpy as np
+
+from scoring import LightweightModel
+
+ARTIFACT_FILES = {
+    "preprocessing_pipeline": "preprocessing_pipeline.pkl",
+    "kmeans_model": "kmeans_model.pkl",
+    "clustering_pipeline": "clustering_pipeline.pkl",
+}
+LIGHTWEIGHT_FILE = "model_light.npz"
+LIGHTWEIGHT_VERSION = 1
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """Memuat artefak model secara lazy (sekali per proses) beserta metadata versinya."""
+    def __init__(self, base_dir=".", files=ARTIFACT_FILES, lightweight_file=LIGHTWEIGHT_FILE):
+        self.base_dir = base_dir
+        self.files = dict(files)
+        self.lightweight_file = lightweight_file
+
+        self._objects = {}
+        self._load_seconds = {}
+        self._hashes = {}
+        self._lock = threading.RLock()
+
+    def path(self, name):
+        return os.path.join(self.base_dir, self.files[name])
+
+    def sha256(self, name):
+        """Hash SHA-256 artefak; dihitung ulang hanya jika ukuran atau waktu modifikasi berubah."""
+        path = self.path(name)
+        stat = os.stat(path)
+        key = (stat.st_size, stat.st_mtime_ns)
+        cached = self._hashes.get(name)
+        if cached is None or cached[0] != key:
+            self._hashes[name] = (key, file_sha256(path))
+        return self._hashes[name][1]
+
+    def get(self, name):
+        """Mengembalikan artefak `name`, memuatnya dengan joblib jika belum dimuat."""
+        if name not in self._objects:
+            with self._lock:
+                if name not in self._objects:
+                    import joblib
+
+                    start = time.perf_counter()
+                    self._objects[name] = joblib.load(self.path(name))
+                    self._load_seconds[name] = time.perf_counter() - start
+        return self._objects[name]
+
+    @property
+    def preprocessing_pipeline(self):
+        return self.get("preprocessing_pipeline")
+
+    @property
+    def kmeans_model(self):
+        return self.get("kmeans_model")
+
+    @property
+    def clustering_pipeline(self):
+        return self.get("clustering_pipeline")
+
+    def metadata(self):
+        """Metadata semua artefak: file, ukuran, waktu modifikasi, SHA-256, dan status pemuatan."""
+        rows = []
+        for name in [*self.files, "lightweight"]:
+            path = self.path(name) if name in self.files else os.path.join(self.base_dir, self.lightweight_file)
+            if not os.path.exists(path):
+                rows.append({"Artefak": name, "File": os.path.basename(path), "Tersedia": False})
+                continue
+            stat = os.stat(path)
+            rows.append({
+                "Artefak": name,
+                "File": os.path.basename(path),
+                "Tersedia": True,
+                "Ukuran (byte)": stat.st_size,
+                "Diubah": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(stat.st_mtime)),
+                "SHA-256": (self.sha256(name) if name in self.files else file_sha256(path))[:12],
+                "Dimuat": name in self._objects,
+                "Waktu Muat (detik)": self._load_seconds.get(name),
+            })
+        return rows
+
+    def lightweight(self, category_table, category_labels, default_category):
+        """
+        Model ringan untuk penilaian cepat. Dimuat dari file .npz jika masih sesuai dengan
+        `kmeans_model.pkl` dan tabel kategori; jika tidak, dibuat dari model lalu disimpan.
+        """
+        if "lightweight" in self._objects:
+            return self._objects["lightweight"]
+
+        path = os.path.join(self.base_dir, self.lightweight_file)
+        source_hash = self.sha256("kmeans_model")
+        category_table = np.asarray(category_table)
+
+        with self._lock:
+            model = None
+            if os.path.exists(path):
+                try:
+                    model = LightweightModel.load(path)
+                except (OSError, ValueError, KeyError):
+                    model = None
+            stale = model is None or (
+                model.metadata.get("version") != LIGHTWEIGHT_VERSION
+                or model.metadata.get("kmeans_model_sha256") != source_hash
+                or not np.array_equal(model.category_table, category_table)
+                or model.category_labels != list(category_labels)
+                or model.default_category != default_category
+            )
+            if stale:
+                import sklearn
+
+                model = LightweightModel.from_model(
+                    self.get("kmeans_model"), category_table, category_labels, default_category,
+                    metadata={
+                        "version": LIGHTWEIGHT_VERSION,
+                        "kmeans_model_sha256": source_hash,
+                        "sklearn_version": sklearn.__version__,
+                        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    },
+                )
+                try:
+                    model.save(path)
+                except OSError:
+                    pass  # Direktori hanya-baca: model ringan tetap dipakai dari memori
+            self._objects["lightweight"] = model
+        return model
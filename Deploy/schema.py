@@ -0,0 +1,93 @@
+"""
+Skema tipe data ringkas untuk DataFrame KPI.
+
+Teks yang berulang (unit, kategori P/K, Nilai Kinerja) disimpan sebagai `category`, kode band
+dan ID klaster sebagai int8 (Int8 jika ada nilai kosong), dan NIP sebagai Int64 (nullable).
+Skema diterapkan saat data dimuat dan saat file diunggah; `memory_report` membandingkan
+pemakaian memori sebelum dan sesudah skema diterapkan.
+"""
+import numpy as np
+import pandas as pd
+
+KPI_SCHEMA = {
+    "NIP": "Int64",
+    "Bagian/Fakultas": "category",
+    "P": "category",
+    "K": "category",
+    "Total": "category",
+    "Nilai Talenta": "category",
+    "Nilai Kinerja": "category",
+    "P_num": "int8",
+    "K_num": "int8",
+    "Cluster": "int8",
+}
+
+
+def _convert(values, dtype):
+    if dtype == "Int64":
+        # NIP yang tidak seluruhnya berupa angka tetap disimpan sebagai teks
+        numbers = pd.to_numeric(values, errors="coerce")
+        if numbers.isna().sum() != values.isna().sum():
+            return values.astype("string")
+        return numbers.astype("Int64")
+    if dtype == "int8":
+        numbers = pd.to_numeric(values, errors="coerce")
+        return numbers.astype("Int8" if numbers.isna().any() else "int8")
+    return values.astype(dtype)
+
+
+def apply_schema(data, schema=KPI_SCHEMA):
+    """Mengembalikan DataFrame dengan kolom pada `schema` dikonversi (kolom lain tidak disalin ulang)."""
+    converted = {
+        col: _convert(data[col], dtype)
+        for col, dtype in schema.items()
+        if col in data.columns and str(data[col].dtype) != dtype
+    }
+    return data.assign(**converted) if converted else data
+
+
+def concat_frames(frames, schema=KPI_SCHEMA):
+    """
+    `pd.concat` yang mempertahankan kolom kategori: kategori setiap kolom digabung (terurut)
+    sebelum penggabungan, sehingga hasilnya tidak berubah kembali menjadi object.
+    """
+    frames = [apply_schema(frame, schema) for frame in frames]
+    for col, dtype in schema.items():
+        if dtype != "category":
+            continue
+        parts = [frame[col] for frame in frames if col in frame.columns]
+        if not parts:
+            continue
+        categories = sorted(set().union(*(part.cat.categories for part in parts)), key=str)
+        frames = [
+            frame.assign(**{col: frame[col].cat.set_categories(categories)}) if col in frame.columns else frame
+            for frame in frames
+        ]
+    return pd.concat(frames, ignore_index=True)
+
+
+def memory_report(data, schema=KPI_SCHEMA):
+    """
+    Pemakaian memori per kolom (byte, termasuk isi string) sebelum dan sesudah skema diterapkan.
+    "Sebelum" dihitung dengan tipe bawaan pandas (object untuk teks, int64/float64 untuk angka).
+    """
+    compact = apply_schema(data, schema)
+    baseline = {}
+    for col in data.columns:
+        values = data[col]
+        if isinstance(values.dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(values.dtype):
+            values = values.astype(object)
+        elif pd.api.types.is_integer_dtype(values.dtype):
+            values = values.astype("float64" if values.isna().any() else "int64")
+        baseline[col] = values.memory_usage(index=False, deep=True)
+
+    report = pd.DataFrame({
+        "Kolom": list(data.columns),
+        "Tipe": [str(compact[col].dtype) for col in data.columns],
+        "Sebelum (KB)": [baseline[col] / 1024 for col in data.columns],
+        "Sesudah (KB)": [compact[col].memory_usage(index=False, deep=True) / 1024 for col in data.columns],
+    })
+    total = report[["Sebelum (KB)", "Sesudah (KB)"]].sum()
+    report = pd.concat([report, pd.DataFrame([{"Kolom": "Total", "Tipe": "", **total}])], ignore_index=True)
+    report["Rasio"] = np.where(report["Sebelum (KB)"] > 0, report["Sesudah (KB)"] / report["Sebelum (KB)"], np.nan)
+    return report
@@ -0,0 +1,165 @@
+"""
+Prediksi klaster berbasis tabel sel (P_num, K_num).
+
+Ruang fitur model hanya berisi 5 x 4 = 20 sel diskrit, sehingga klaster untuk setiap sel
+cukup dihitung sekali ketika model dimuat. Prediksi selanjutnya hanya berupa indeks array.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+from banding import P_EDGES, K_EDGES
+
+FEATURE_COLUMNS = ["P_num", "K_num"]
+N_P, N_K = 5, 4
+
+
+class CellTablePredictor:
+    """Membungkus model K-Means dengan tabel klaster yang sudah dihitung untuk setiap sel P_num x K_num."""
+    def __init__(self, model, n_p=N_P, n_k=N_K):
+        self.model = model
+        self.n_p = n_p
+        self.n_k = n_k
+
+        p_grid, k_grid = np.meshgrid(np.arange(1, n_p + 1), np.arange(1, n_k + 1), indexing="ij")
+        grid = np.column_stack([p_grid.ravel(), k_grid.ravel()])
+        self.table = self._model_predict(grid).reshape(n_p, n_k)
+
+    def _model_predict(self, features):
+        # Model dilatih dengan nama kolom, jadi fallback juga dikirim sebagai DataFrame
+        features = np.asarray(features, dtype=float)
+        if hasattr(self.model, "feature_names_in_"):
+            features = pd.DataFrame(features, columns=self.model.feature_names_in_)
+        return self.model.predict(features)
+
+    def predict_cells(self, p_num, k_num):
+        """
+        Memprediksi klaster dari array P_num dan K_num.
+        Nilai di luar grid (pecahan hasil winsorize, NaN, atau di luar rentang) diprediksi oleh model asli.
+        """
+        p = np.asarray(p_num, dtype=float).ravel()
+        k = np.asarray(k_num, dtype=float).ravel()
+
+        in_grid = (
+            (p == np.round(p)) & (k == np.round(k))
+            & (p >= 1) & (p <= self.n_p) & (k >= 1) & (k <= self.n_k)
+        )
+        labels = np.empty(p.shape, dtype=self.table.dtype)
+        labels[in_grid] = self.table[p[in_grid].astype(np.intp) - 1, k[in_grid].astype(np.intp) - 1]
+        if not in_grid.all():
+            outside = ~in_grid
+            labels[outside] = self._model_predict(np.column_stack([p[outside], k[outside]]))
+        return labels
+
+    def predict(self, X):
+        """Antarmuka yang sama dengan `kmeans_model.predict` untuk DataFrame atau array dua kolom."""
+        if isinstance(X, pd.DataFrame):
+            return self.predict_cells(X[FEATURE_COLUMNS[0]].to_numpy(), X[FEATURE_COLUMNS[1]].to_numpy())
+        X = np.asarray(X)
+        return self.predict_cells(X[:, 0], X[:, 1])
+
+
+class LightweightModel:
+    """
+    Model ringan tanpa objek sklearn/scipy: centroid, ambang banding, tabel klaster per sel,
+    dan tabel kategori. Disimpan sebagai file .npz sehingga jalur penilaian satu data dapat
+    dimulai tanpa unpickle pipeline.
+    """
+    def __init__(self, centroids, cluster_table, category_table, category_labels, default_category,
+                 p_edges=None, k_edges=None, metadata=None):
+        self.centroids = np.asarray(centroids, dtype=float)
+        self.table = np.asarray(cluster_table)
+        self.category_table = np.asarray(category_table)
+        self.category_labels = [str(label) for label in category_labels]
+        self.default_category = str(default_category)
+        self.p_edges = np.asarray(P_EDGES if p_edges is None else p_edges)
+        self.k_edges = np.asarray(K_EDGES if k_edges is None else k_edges)
+        self.metadata = dict(metadata or {})
+        self.n_p, self.n_k = self.table.shape
+
+        if not (np.array_equal(self.p_edges, P_EDGES) and np.array_equal(self.k_edges, K_EDGES)):
+            raise ValueError("Ambang banding pada artefak berbeda dengan banding.py; buat ulang artefak ringan.")
+
+    @classmethod
+    def from_model(cls, model, category_table, category_labels, default_category, metadata=None):
+        """Membuat model ringan dari model K-Means yang sudah dilatih."""
+        predictor = CellTablePredictor(model)
+        return cls(model.cluster_centers_, predictor.table, category_table, category_labels,
+                   default_category, metadata=metadata)
+
+    @property
+    def n_clusters(self):
+        return len(self.centroids)
+
+    @property
+    def cluster_centers_(self):
+        return self.centroids
+
+    def predict_cells(self, p_num, k_num):
+        """Sama dengan `CellTablePredictor.predict_cells`; nilai di luar grid memakai centroid terdekat."""
+        p = np.asarray(p_num, dtype=float).ravel()
+        k = np.asarray(k_num, dtype=float).ravel()
+
+        in_grid = (
+            (p == np.round(p)) & (k == np.round(k))
+            & (p >= 1) & (p <= self.n_p) & (k >= 1) & (k <= self.n_k)
+        )
+        labels = np.empty(p.shape, dtype=self.table.dtype)
+        labels[in_grid] = self.table[p[in_grid].astype(np.intp) - 1, k[in_grid].astype(np.intp) - 1]
+        if not in_grid.all():
+            outside = np.column_stack([p[~in_grid], k[~in_grid]])
+            distances = ((outside[:, np.newaxis, :] - self.centroids[np.newaxis, :, :]) ** 2).sum(axis=2)
+            labels[~in_grid] = distances.argmin(axis=1)
+        return labels
+
+    def predict(self, X):
+        if isinstance(X, pd.DataFrame):
+            return self.predict_cells(X[FEATURE_COLUMNS[0]].to_numpy(), X[FEATURE_COLUMNS[1]].to_numpy())
+        X = np.asarray(X)
+        return self.predict_cells(X[:, 0], X[:, 1])
+
+    def categorize(self, p_num, k_num):
+        """Kategori Nilai Kinerja dari tabel kategori; kombinasi di luar tabel mendapat kategori default."""
+        p = pd.to_numeric(pd.Series(np.ravel(p_num)), errors="coerce").to_numpy(dtype=float)
+        k = pd.to_numeric(pd.Series(np.ravel(k_num)), errors="coerce").to_numpy(dtype=float)
+        n_p, n_k = self.category_table.shape
+
+        valid = (
+            (p == np.round(p)) & (k == np.round(k))
+            & (p >= 1) & (p <= n_p) & (k >= 1) & (k <= n_k)
+        )
+        codes = np.full(p.shape, self.category_labels.index(self.default_category), dtype=np.int8)
+        codes[valid] = self.category_table[p[valid].astype(np.intp) - 1, k[valid].astype(np.intp) - 1]
+        return pd.Categorical.from_codes(codes, categories=self.category_labels)
+
+    def score(self, records):
+        """Menilai data (DataFrame atau list of dict dengan P_num dan K_num): menambahkan Cluster dan Nilai Kinerja."""
+        records = pd.DataFrame(records).copy()
+        records["Cluster"] = self.predict_cells(records["P_num"], records["K_num"])
+        records["Nilai Kinerja"] = self.categorize(records["P_num"], records["K_num"])
+        return records
+
+    # --- Simpan / Muat ---
+    def save(self, path):
+        np.savez(
+            path,
+            centroids=self.centroids,
+            cluster_table=self.table,
+            category_table=self.category_table,
+            category_labels=np.array(self.category_labels),
+            default_category=np.array(self.default_category),
+            p_edges=self.p_edges,
+            k_edges=self.k_edges,
+            metadata=np.array(json.dumps(self.metadata)),
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as artifact:
+            return cls(
+                artifact["centroids"], artifact["cluster_table"], artifact["category_table"],
+                artifact["category_labels"].tolist(), artifact["default_category"].item(),
+                p_edges=artifact["p_edges"], k_edges=artifact["k_edges"],
+                metadata=json.loads(artifact["metadata"].item()),
+            )
@@ -0,0 +1,198 @@
+"""
+Indeks pencarian nama pegawai untuk menu "Cari Pegawai".
+
+Teks `Nama Pegawai` dan `Bagian/Fakultas` dinormalisasi (tanpa aksen, huruf kecil, spasi
+dirapikan) lalu dipecah menjadi trigram per kata dengan padding seperti pg_trgm
+("  ab", " abc", ..., "yz "). Trigram awal kata sekaligus berfungsi sebagai indeks prefiks
+untuk kueri 1-2 huruf.
+
+- Pencarian substring: irisan posting trigram kueri, lalu diverifikasi dengan `in`.
+- Pencarian fuzzy: kemiripan Jaccard trigram, untuk melengkapi hasil bila substring kurang dari `limit`.
+
+Indeks dibangun sekali saat data dimuat. Data baru ditambahkan ke indeks delta kecil yang
+digabungkan kembali ke indeks utama setelah melewati `rebuild_threshold`.
+"""
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+SEARCH_FIELDS = ["Nama Pegawai", "Bagian/Fakultas"]
+
+
+def normalize(text):
+    """Menghapus aksen, mengubah ke huruf kecil (casefold), dan merapikan spasi."""
+    if text is None or (isinstance(text, float) and np.isnan(text)):
+        return ""
+    text = unicodedata.normalize("NFKD", str(text))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(text.casefold().split())
+
+
+def trigrams(text):
+    """Trigram per kata dengan padding dua spasi di awal dan satu spasi di akhir kata."""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _query_grams(query):
+    """
+    Trigram yang wajib dimiliki teks yang mengandung `query` sebagai substring.
+    Kata pertama bisa berupa akhir kata di teks, jadi hanya trigram bagian dalamnya yang dipakai;
+    kata berikutnya pasti merupakan awal kata.
+    """
+    words = query.split()
+    grams = set()
+    for position, word in enumerate(words):
+        grams.update(word[i:i + 3] for i in range(len(word) - 2))
+        if position > 0 or len(words) == 1 and len(word) < 3:
+            grams.update(f"  {word}"[i:i + 3] for i in range(min(len(word), 2)))
+    return grams
+
+
+class NameSearchIndex:
+    """Indeks trigram untuk pencarian substring dan fuzzy dengan hasil terurut."""
+    def __init__(self, fields=SEARCH_FIELDS, rebuild_threshold=10_000):
+        self.fields = list(fields)
+        self.rebuild_threshold = rebuild_threshold
+
+        # Dokumen = (baris, kolom); doc_id = baris * jumlah_kolom + indeks_kolom
+        self.texts = []
+        self._lengths = np.empty(0, dtype=np.int64)
+        self._n_grams = np.empty(0, dtype=np.int64)
+        self._heads = np.empty(0, dtype="<U3")
+
+        self._offsets = {}
+        self._docs = np.empty(0, dtype=np.int64)
+        self._delta = {}
+        self._delta_size = 0
+
+    @classmethod
+    def from_frame(cls, data, fields=SEARCH_FIELDS, **kwargs):
+        index = cls(fields, **kwargs)
+        index.add(data)
+        return index
+
+    @property
+    def n_rows(self):
+        return len(self.texts) // len(self.fields)
+
+    def add(self, rows):
+        """
+        Menambahkan baris baru (DataFrame atau list of dict) ke akhir indeks.
+        Baris harus ditambahkan dengan urutan yang sama seperti data yang dicari dengan `data.iloc`;
+        pemanggil dari banyak thread perlu menyerialkan penambahan data dan indeks dengan satu kunci.
+        """
+        rows = pd.DataFrame(rows)
+        start = len(self.texts)
+        columns = [rows[field] if field in rows.columns else pd.Series([""] * len(rows)) for field in self.fields]
+        new_texts = [normalize(value) for values in zip(*columns) for value in values]
+        new_grams = [trigrams(text) for text in new_texts]
+
+        self.texts.extend(new_texts)
+        self._lengths = np.concatenate([self._lengths, [len(text) for text in new_texts]]).astype(np.int64)
+        self._n_grams = np.concatenate([self._n_grams, [len(grams) for grams in new_grams]]).astype(np.int64)
+        self._heads = np.concatenate([self._heads, np.array([text[:3] for text in new_texts], dtype="<U3")])
+
+        for doc, grams in enumerate(new_grams, start=start):
+            for gram in grams:
+                self._delta.setdefault(gram, []).append(doc)
+        self._delta_size += sum(len(grams) for grams in new_grams)
+
+        if self._delta_size >= self.rebuild_threshold or not self._offsets:
+            self._merge_delta()
+        return self
+
+    def _merge_delta(self):
+        """Menggabungkan indeks delta ke posting utama (array terurut per trigram)."""
+        keys = list(self._offsets) + [gram for gram in self._delta if gram not in self._offsets]
+        parts = []
+        for gram in keys:
+            parts.append(self._postings(gram))
+        sizes = np.array([len(part) for part in parts], dtype=np.int64)
+        ends = np.cumsum(sizes)
+        self._docs = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+        self._offsets = {gram: (end - size, end) for gram, size, end in zip(keys, sizes, ends)}
+        self._delta = {}
+        self._delta_size = 0
+
+    def _postings(self, gram):
+        start, end = self._offsets.get(gram, (0, 0))
+        postings = self._docs[start:end]
+        if gram in self._delta:
+            postings = np.concatenate([postings, np.asarray(self._delta[gram], dtype=np.int64)])
+        return postings
+
+    def _substring_candidates(self, query):
+        postings = sorted((self._postings(gram) for gram in _query_grams(query)), key=len)
+        if not postings:
+            return np.arange(len(self.texts), dtype=np.int64)
+        candidates = postings[0]
+        for other in postings[1:]:
+            if len(candidates) == 0:
+                break
+            candidates = np.intersect1d(candidates, other, assume_unique=True)
+        return candidates
+
+    def _short_candidates(self, query):
+        # Gabungan posting semua trigram yang mengandung kueri pendek
+        grams = [gram for gram in {**self._offsets, **self._delta} if query in gram]
+        if not grams:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate([self._postings(gram) for gram in grams]))
+
+    def _rank(self, docs, query):
+        # Urutan: kolom (nama lebih dulu), diawali kueri, teks terpendek, urutan data
+        head = query[:3]
+        starts = self._heads[docs].astype(f"<U{len(head)}") != head
+        order = np.lexsort((docs, self._lengths[docs], starts, docs % len(self.fields)))
+        return docs[order]
+
+    def search(self, query, limit=20, fuzzy=True, min_similarity=0.3):
+        """
+        Mencari baris yang cocok dengan `query`.
+        Mengembalikan posisi baris (untuk `data.iloc`) terurut dari hasil terbaik, maksimal `limit` baris.
+        """
+        query = normalize(query)
+        if not query or limit <= 0:
+            return np.empty(0, dtype=np.int64)
+
+        n_fields = len(self.fields)
+        rows, seen = [], set()
+
+        candidates = self._substring_candidates(query)
+        groups = [candidates]
+        if len(query) < 3:
+            # Kueri 1-2 huruf: awal kata lebih dulu, lalu (bila kurang) substring di tengah kata
+            groups.append(None)
+
+        for docs in groups:
+            if docs is None:
+                docs = np.setdiff1d(self._short_candidates(query), candidates, assume_unique=True)
+            for doc in self._rank(docs, query):
+                row = int(doc) // n_fields
+                if row in seen or query not in self.texts[doc]:
+                    continue
+                rows.append(row)
+                seen.add(row)
+                if len(rows) == limit:
+                    return np.asarray(rows, dtype=np.int64)
+
+        grams = trigrams(query)
+        if fuzzy and len(query) >= 3:
+            postings = [self._postings(gram) for gram in grams]
+            docs, shared = np.unique(np.concatenate(postings), return_counts=True)
+            similarity = shared / (len(grams) + self._n_grams[docs] - shared)
+            keep = similarity >= min_similarity
+            docs, similarity = docs[keep], similarity[keep]
+            for doc in docs[np.lexsort((docs, -similarity))]:
+                row = int(doc) // n_fields
+                if row not in seen:
+                    rows.append(row)
+                    seen.add(row)
+                    if len(rows) == limit:
+                        break
+        return np.asarray(rows, dtype=np.int64)
@@ -0,0 +1,286 @@
+"""
+Layanan penilaian (scoring) dengan micro-batching.
+
+Banyak pemanggil dapat mengirim satu data pegawai secara bersamaan (`submit` / `score`).
+Thread pekerja mengumpulkan data dari antrean menjadi batch (maksimal `max_batch_size` data
+atau menunggu paling lama `max_wait_ms`), menilai satu batch dengan satu panggilan vektor
+ke model ringan, lalu menyelesaikan `Future` milik setiap pemanggil.
+
+Endpoint HTTP lokal (tanpa Streamlit):
+    python service.py --port 8502
+    POST /score    {"Nilai P": 95, "Nilai K": 2}  atau list data
+    GET  /metrics  throughput dan latensi antrean
+"""
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from banding import INVALID_CODE, K_LABELS, P_LABELS, kategori_k, kategori_p
+from registry import LIGHTWEIGHT_FILE
+from scoring import LightweightModel
+
+MAX_BATCH_SIZE = 256
+MAX_WAIT_MS = 5.0
+RESULT_COLUMNS = ["P", "P_num", "K", "K_num", "Cluster", "Nilai Kinerja"]
+
+
+def _numbers(record, fields):
+    values = []
+    for field in fields:
+        try:
+            values.append(float(record[field]))
+        except (TypeError, ValueError):
+            raise ValueError(f"{field} harus berupa angka.") from None
+    return values
+
+
+def _grid_code(value, labels, field):
+    # Kode banding harus bilangan bulat di dalam grid (P_num 1-5, K_num 1-4)
+    if not value.is_integer() or not INVALID_CODE < value < len(labels):
+        raise ValueError(f"{field} harus bilangan bulat 1-{len(labels) - 1}.")
+    return int(value)
+
+
+def prepare_record(record):
+    """
+    Memeriksa satu data dan menghitung bandingnya sendiri, tidak bergantung pada data lain dalam batch.
+    Banding dihitung dari `Nilai P`/`Nilai K` bila keduanya ada; jika tidak, `P_num`/`K_num` dipakai langsung.
+    Mengembalikan salinan data dengan P, P_num, K, dan K_num; ValueError jika data tidak valid.
+    """
+    record = dict(record)
+    if record.get("Nilai P") is not None and record.get("Nilai K") is not None:
+        nilai_p, nilai_k = _numbers(record, ["Nilai P", "Nilai K"])
+        (p, p_num), (k, k_num) = kategori_p(nilai_p), kategori_k(nilai_k)
+    elif record.get("P_num") is not None and record.get("K_num") is not None:
+        p_num, k_num = _numbers(record, ["P_num", "K_num"])
+        p_num, k_num = _grid_code(p_num, P_LABELS, "P_num"), _grid_code(k_num, K_LABELS, "K_num")
+        p, k = P_LABELS[p_num], K_LABELS[k_num]
+    else:
+        raise ValueError("Data harus berisi Nilai P dan Nilai K, atau P_num dan K_num.")
+
+    if p_num == INVALID_CODE or k_num == INVALID_CODE:
+        raise ValueError("Nilai P atau Nilai K tidak termasuk kategori.")
+    record.update({"P": p, "P_num": p_num, "K": k, "K_num": k_num})
+    return record
+
+
+def score_records(records, model):
+    """
+    Menilai sekumpulan data (list of dict) sekaligus. Setiap data diperiksa dan di-banding sendiri
+    (`prepare_record`), lalu semua data dinilai dengan satu panggilan vektor.
+    Mengembalikan DataFrame dengan kolom masukan ditambah P, P_num, K, K_num, Cluster, dan Nilai Kinerja.
+    """
+    return model.score(pd.DataFrame([prepare_record(record) for record in records]))
+
+
+class ScoringService:
+    """Batcher berbasis thread: satu data per pemanggil, satu panggilan model per batch."""
+    def __init__(self, model, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS, latency_window=10_000):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+
+        self._queue = queue.Queue()
+        self._stopped = threading.Event()
+        self._metrics_lock = threading.Lock()
+        self._latencies = deque(maxlen=latency_window)
+        self._started_at = time.perf_counter()
+        self._n_records = 0
+        self._n_batches = 0
+        self._n_errors = 0
+        self._busy_seconds = 0.0
+
+        self._worker = threading.Thread(target=self._run, name="scoring-service", daemon=True)
+        self._worker.start()
+
+    def submit(self, record):
+        """
+        Mengirim satu data ke antrean; mengembalikan `Future` berisi dict hasil penilaian.
+        Data yang tidak valid langsung ditolak lewat `Future`-nya sendiri dan tidak masuk ke batch.
+        """
+        if self._stopped.is_set():
+            raise RuntimeError("Layanan penilaian sudah dihentikan.")
+        future = Future()
+        try:
+            prepared = prepare_record(record)
+        except ValueError as error:
+            with self._metrics_lock:
+                self._n_errors += 1
+            future.set_exception(error)
+            return future
+        self._queue.put((prepared, future, time.perf_counter()))
+        return future
+
+    def score(self, record, timeout=None):
+        """Menilai satu data dan menunggu hasilnya."""
+        return self.submit(record).result(timeout)
+
+    def close(self, timeout=None):
+        """Menghentikan thread pekerja setelah antrean yang tersisa selesai dinilai."""
+        self._stopped.set()
+        self._queue.put(None)
+        self._worker.join(timeout)
+
+    def _collect(self):
+        item = self._queue.get()
+        if item is None:
+            return []
+        batch = [item]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if not batch:
+                if self._stopped.is_set() and self._queue.empty():
+                    return
+                continue
+            self._score_batch(batch)
+
+    def _score_batch(self, batch):
+        start = time.perf_counter()
+        records, futures, submitted = zip(*batch)
+        n_errors = 0
+        try:
+            # Data sudah diperiksa dan di-banding di `submit`
+            results = self.model.score(pd.DataFrame(list(records)))
+            rows = results.astype(object).where(results.notna(), None).to_dict("records")
+            for future, row in zip(futures, rows):
+                future.set_result(row)
+        except Exception as error:  # Kegagalan model diteruskan ke semua pemanggil batch ini
+            n_errors = len(futures)
+            for future in futures:
+                if not future.done():
+                    future.set_exception(error)
+
+        with self._metrics_lock:
+            self._latencies.extend(start - t for t in submitted)
+            self._n_records += len(batch)
+            self._n_batches += 1
+            self._n_errors += n_errors
+            self._busy_seconds += time.perf_counter() - start
+
+    def metrics(self):
+        """Ringkasan throughput, ukuran batch, dan latensi antrean (waktu tunggu sebelum dinilai)."""
+        with self._metrics_lock:
+            latencies = np.array(self._latencies) * 1000
+            elapsed = time.perf_counter() - self._started_at
+            return {
+                "records": self._n_records,
+                "batches": self._n_batches,
+                "errors": self._n_errors,
+                "queue_size": self._queue.qsize(),
+                "mean_batch_size": self._n_records / self._n_batches if self._n_batches else 0.0,
+                "throughput_per_s": self._n_records / elapsed if elapsed > 0 else 0.0,
+                "scoring_throughput_per_s": self._n_records / self._busy_seconds if self._busy_seconds > 0 else 0.0,
+                "queue_latency_ms_p50": float(np.percentile(latencies, 50)) if len(latencies) else 0.0,
+                "queue_latency_ms_p95": float(np.percentile(latencies, 95)) if len(latencies) else 0.0,
+                "queue_latency_ms_max": float(latencies.max()) if len(latencies) else 0.0,
+            }
+
+
+# --- Endpoint HTTP ---
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def make_handler(service, timeout=30):
+    """Membuat handler HTTP yang meneruskan setiap data ke `service`."""
+    class ScoringHandler(BaseHTTPRequestHandler):
+        def _send(self, status, payload):
+            body = json.dumps(payload, default=_json_default).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/metrics":
+                self._send(200, service.metrics())
+            else:
+                self._send(404, {"error": "Endpoint tidak ditemukan."})
+
+        def do_POST(self):
+            if self.path != "/score":
+                self._send(404, {"error": "Endpoint tidak ditemukan."})
+                return
+            try:
+                length = int(self.headers["Content-Length"])
+            except (TypeError, ValueError):
+                length = -1
+            if length < 0:
+                self._send(400, {"error": "Header Content-Length tidak valid."})
+                return
+            try:
+                payload = json.loads(self.rfile.read(length) or b"null")
+            except ValueError:
+                self._send(400, {"error": "Body harus berupa JSON."})
+                return
+            single = isinstance(payload, dict)
+            records = [payload] if single else payload
+            if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+                self._send(400, {"error": "Body harus berupa objek JSON atau list objek JSON."})
+                return
+
+            # Setiap data dikirim terpisah sehingga dapat digabung dengan permintaan lain
+            futures = [service.submit(record) for record in records]
+            results = []
+            for future in futures:
+                try:
+                    results.append(future.result(timeout))
+                except Exception as error:
+                    results.append({"error": str(error)})
+            self._send(200, results[0] if single else results)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ScoringHandler
+
+
+def serve(model_path=LIGHTWEIGHT_FILE, host="127.0.0.1", port=8502,
+          max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+    """Menjalankan endpoint HTTP lokal untuk layanan penilaian."""
+    service = ScoringService(LightweightModel.load(model_path), max_batch_size, max_wait_ms)
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    print(f"Layanan penilaian berjalan di http://{host}:{port} (POST /score, GET /metrics)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Endpoint HTTP lokal untuk penilaian data pegawai.")
+    parser.add_argument("--model", default=LIGHTWEIGHT_FILE, help="File model ringan (.npz)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--max-batch-size", type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS)
+    args = parser.parse_args()
+    serve(args.model, args.host, args.port, args.max_batch_size, args.max_wait_ms)
@@ -0,0 +1,61 @@
+"""
+Array NumPy bersama antarproses (`multiprocessing.shared_memory`) untuk pekerjaan paralel.
+
+Proses utama menyalin array sekali ke satu blok shared memory (`SharedArray.from_array`) dan
+mengirim spesifikasinya (nama blok, shape, dtype) ke pekerja; pekerja memetakan blok yang sama
+tanpa menyalin (`SharedArray.attach`), sehingga data tidak di-pickle ke setiap tugas.
+
+    with SharedArray.from_array(features) as shared:
+        executor.submit(task, shared.spec, start, stop)
+
+    def task(spec, start, stop):
+        with SharedArray.attach(spec) as shared:
+            return compute(shared.array[start:stop])
+
+Hasil `compute` tidak boleh berupa view dari `shared.array`, karena blok ditutup setelah `with`.
+"""
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+class SharedArray:
+    """Array di shared memory; pembuat blok (`owner`) juga menghapusnya saat ditutup."""
+    def __init__(self, block, shape, dtype, owner=False):
+        self.block = block
+        self.owner = owner
+        self.array = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+    @classmethod
+    def from_array(cls, array):
+        """Membuat blok baru berisi salinan `array`."""
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        shared = cls(block, array.shape, array.dtype, owner=True)
+        shared.array[...] = array
+        return shared
+
+    @classmethod
+    def attach(cls, spec):
+        """Memetakan blok yang sudah ada dari spesifikasi `(nama, shape, dtype)`."""
+        name, shape, dtype = spec
+        return cls(shared_memory.SharedMemory(name=name), shape, dtype)
+
+    @property
+    def spec(self):
+        return self.block.name, self.array.shape, self.array.dtype.str
+
+    def close(self):
+        if self.block is None:
+            return
+        self.array = None  # View harus dilepas sebelum blok ditutup
+        self.block.close()
+        if self.owner:
+            self.block.unlink()
+        self.block = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
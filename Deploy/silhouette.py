@@ -0,0 +1,149 @@
+"""
+Silhouette tanpa matriks jarak n x n.
+
+- Fitur diskrit (P_num/K_num, paling banyak 20 titik unik): `silhouette_exact` menghitung
+  silhouette tepat dari titik unik berbobot jumlah baris per klaster dalam O(u^2 * k) untuk u titik
+  unik. Hasilnya sama dengan `sklearn.metrics.silhouette_score` / `silhouette_samples` per baris.
+- Fitur kontinu (misalnya Nilai P mentah): `silhouette_estimate` menghitung silhouette tepat untuk
+  sampel baris acak terhadap seluruh data, lalu rata-rata beserta selang kepercayaannya.
+
+Jarak dihitung per blok (`block_size` x `block_size`), sehingga memori tidak bergantung pada n.
+"""
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+from sklearn.metrics.pairwise import euclidean_distances
+
+from training import collapse_points
+
+BLOCK_SIZE = 2048
+
+
+def cluster_distance_sums(anchors, points, point_counts, block_size=BLOCK_SIZE):
+    """
+    Jumlah jarak dari setiap anchor ke semua baris setiap klaster (anchor x klaster).
+    `point_counts[klaster, titik]` adalah jumlah baris klaster tersebut pada setiap titik di `points`.
+    """
+    anchors = np.asarray(anchors, dtype=float)
+    points = np.asarray(points, dtype=float)
+    sums = np.zeros((len(anchors), point_counts.shape[0]))
+    for i in range(0, len(anchors), block_size):
+        for j in range(0, len(points), block_size):
+            distances = euclidean_distances(anchors[i:i + block_size], points[j:j + block_size])
+            sums[i:i + block_size] += distances @ point_counts[:, j:j + block_size].T
+    return sums
+
+
+def silhouette_from_sums(sums, labels, sizes):
+    """
+    Silhouette setiap anchor dari jumlah jarak per klaster (`cluster_distance_sums`), label anchor,
+    dan jumlah baris per klaster. Anchor di klaster berisi satu baris bernilai 0 (seperti sklearn).
+    """
+    labels = np.asarray(labels, dtype=np.intp)
+    rows = np.arange(len(labels))
+    own_size = sizes[labels]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        a = sums[rows, labels] / (own_size - 1)
+        other = np.where(sizes > 0, sums / sizes, np.inf)
+    other[rows, labels] = np.inf
+    b = other.min(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        s = (b - a) / np.maximum(a, b)
+    s[own_size <= 1] = 0.0
+    return np.nan_to_num(s, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def silhouette_points(points, point_counts, block_size=BLOCK_SIZE):
+    """Silhouette tepat untuk setiap (klaster, titik) dari histogram `point_counts[klaster, titik]` (NaN jika kosong)."""
+    point_counts = np.asarray(point_counts, dtype=float)
+    n_clusters, n_points = point_counts.shape
+    sizes = point_counts.sum(axis=1)
+    sums = cluster_distance_sums(points, points, point_counts, block_size)
+
+    values = np.full((n_clusters, n_points), np.nan)
+    for c in np.flatnonzero(sizes > 0):
+        members = point_counts[c] > 0
+        values[c, members] = silhouette_from_sums(sums[members], np.full(members.sum(), c), sizes)
+    return values
+
+
+def _cluster_table(labels, sizes, means, extra=None):
+    table = pd.DataFrame({"Cluster": labels, "Jumlah Data": sizes, "Silhouette": means, **(extra or {})})
+    return table[table["Jumlah Data"] > 0].reset_index(drop=True)
+
+
+def silhouette_exact(features, labels, sample_weight=None, block_size=BLOCK_SIZE):
+    """
+    Silhouette tepat dari titik unik berbobot (cocok untuk fitur diskrit).
+    Mengembalikan (rata-rata silhouette seluruh baris, tabel per klaster: Cluster, Jumlah Data, Silhouette).
+    """
+    codes, uniques = pd.factorize(np.asarray(labels).ravel(), sort=True)
+    points, _, inverse = collapse_points(features)
+    weight = np.ones(len(codes)) if sample_weight is None else np.asarray(sample_weight, dtype=float)
+    point_counts = np.bincount(
+        codes * len(points) + inverse, weights=weight, minlength=len(uniques) * len(points)
+    ).reshape(len(uniques), len(points))
+
+    values = np.nan_to_num(silhouette_points(points, point_counts, block_size))
+    sizes = point_counts.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = (values * point_counts).sum(axis=1) / sizes
+    overall = float((values * point_counts).sum() / sizes.sum()) if len(uniques) > 1 else np.nan
+    return overall, _cluster_table(uniques, sizes.astype(int) if sample_weight is None else sizes, means)
+
+
+def silhouette_estimate(features, labels, sample_size=1000, confidence=0.95, block_size=BLOCK_SIZE, random_state=None):
+    """
+    Perkiraan silhouette untuk fitur kontinu: silhouette tepat dari `sample_size` baris acak
+    (terhadap seluruh data, dihitung per blok), dengan selang kepercayaan normal untuk
+    rata-rata keseluruhan dan per klaster. `sample_size=None` menghitung semua baris (tepat).
+    Mengembalikan (ringkasan, tabel per klaster dengan CI Bawah/CI Atas).
+    """
+    features = np.asarray(features, dtype=float)
+    if features.ndim == 1:
+        features = features[:, np.newaxis]
+    codes, uniques = pd.factorize(np.asarray(labels).ravel(), sort=True)
+    n = len(codes)
+
+    # Titik referensi diringkas (baris identik cukup dihitung sekali)
+    points, _, inverse = collapse_points(features)
+    point_counts = np.bincount(
+        codes * len(points) + inverse, minlength=len(uniques) * len(points)
+    ).reshape(len(uniques), len(points)).astype(float)
+    sizes = point_counts.sum(axis=1)
+
+    rng = np.random.default_rng(random_state)
+    sample = np.arange(n) if sample_size is None or sample_size >= n else rng.choice(n, sample_size, replace=False)
+    sums = cluster_distance_sums(features[sample], points, point_counts, block_size)
+    values = silhouette_from_sums(sums, codes[sample], sizes)
+
+    # Koreksi populasi terbatas: jika semua baris dihitung, lebar selang 0
+    z = norm.ppf(0.5 + confidence / 2)
+    fpc = np.sqrt(max(0.0, 1 - len(sample) / n)) if n > 1 else 0.0
+
+    def interval(x):
+        if len(x) < 2:
+            return np.mean(x) if len(x) else np.nan, np.nan, np.nan
+        mean = x.mean()
+        half = z * x.std(ddof=1) / np.sqrt(len(x)) * fpc
+        return mean, mean - half, mean + half
+
+    mean, low, high = interval(values)
+    summary = {
+        "Silhouette": float(mean),
+        "CI Bawah": float(low),
+        "CI Atas": float(high),
+        "Tingkat Kepercayaan": confidence,
+        "Jumlah Sampel": len(sample),
+        "Jumlah Data": n,
+    }
+    per_cluster = [interval(values[codes[sample] == c]) for c in range(len(uniques))]
+    table = _cluster_table(
+        uniques, sizes.astype(int), [row[0] for row in per_cluster],
+        extra={
+            "CI Bawah": [row[1] for row in per_cluster],
+            "CI Atas": [row[2] for row in per_cluster],
+            "Jumlah Sampel": np.bincount(codes[sample], minlength=len(uniques)),
+        },
+    )
+    return summary, table
@@ -0,0 +1,210 @@
+"""
+Analisis stabilitas K dengan bootstrap: apakah K terpilih tetap kompak dan stabil jika data diambil ulang.
+
+Untuk setiap K kandidat, `n_bootstrap` sampel bootstrap (pengambilan ulang baris dengan pengembalian)
+masing-masing dilatih dengan beberapa seed. Fitur diringkas menjadi titik unik dengan jumlah baris,
+sehingga satu sampel bootstrap cukup berupa undian multinomial atas jumlah baris per titik (setara
+dengan mengambil ulang baris satu per satu) dan biaya setiap run tidak bergantung pada jumlah pegawai.
+
+Titik unik dan jumlah barisnya disalin sekali ke shared memory (`sharedmem.SharedArray`); pekerja
+di process pool mengerjakan potongan bootstrap per K. Setiap run menghasilkan SSE dan DBI pada sampel
+bootstrap, serta label seluruh data asli untuk Adjusted Rand Index (ARI) terhadap model referensi
+(seluruh data, `random_state`) dan antar seed dalam sampel yang sama. K direkomendasikan jika stabil
+(batas bawah selang ARI referensi >= `min_ari`) dan DBI rata-ratanya terkecil di antara K yang stabil.
+
+    python stability.py --n-bootstrap 1000 --seeds 42 43 44
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from evaluation import ClusterStats
+from sharedmem import SharedArray
+from training import FEATURE_COLUMNS, collapse_points, fit_kmeans_points
+
+MIN_ARI = 0.8
+CHUNK_SIZE = 100
+
+
+def adjusted_rand_weighted(labels_a, labels_b, weights):
+    """
+    Adjusted Rand Index dua pelabelan titik unik berbobot jumlah baris; setara dengan
+    `sklearn.metrics.adjusted_rand_score` pada label setiap baris.
+    """
+    labels_a = np.asarray(labels_a, dtype=np.intp)
+    labels_b = np.asarray(labels_b, dtype=np.intp)
+    contingency = np.zeros((labels_a.max() + 1, labels_b.max() + 1))
+    np.add.at(contingency, (labels_a, labels_b), weights)
+
+    def pairs(x):
+        return (x * (x - 1) / 2).sum()
+
+    sum_cells = pairs(contingency)
+    sum_a = pairs(contingency.sum(axis=1))
+    sum_b = pairs(contingency.sum(axis=0))
+    expected = sum_a * sum_b / pairs(np.array([contingency.sum()]))
+    maximum = (sum_a + sum_b) / 2
+    if maximum == expected:
+        return 1.0
+    return float((sum_cells - expected) / (maximum - expected))
+
+
+def _nearest(points, centers):
+    return ((points[:, np.newaxis, :] - centers[np.newaxis, :, :]) ** 2).sum(axis=2).argmin(axis=1)
+
+
+def bootstrap_runs(points, counts, k, reference, bootstrap_ids, seeds, random_state=42):
+    """
+    Run bootstrap untuk satu K. Sampel ke-b selalu sama untuk setiap K (seed `[random_state, b]`),
+    sehingga perbedaan antar K tidak berasal dari perbedaan sampel.
+    Mengembalikan satu baris per (bootstrap, seed).
+    """
+    n_rows = int(counts.sum())
+    rows = []
+    for b in bootstrap_ids:
+        rng = np.random.default_rng([random_state, int(b)])
+        sample_counts = rng.multinomial(n_rows, counts / n_rows).astype(float)
+        present = sample_counts > 0
+        if present.sum() < k:
+            # Titik unik pada sampel lebih sedikit dari K: run tidak dapat dilatih
+            rows.extend({"K": k, "Bootstrap": int(b), "seed": seed, "SSE": np.nan, "DBI": np.nan,
+                         "ARI Referensi": np.nan, "ARI Antar Seed": np.nan} for seed in seeds)
+            continue
+
+        sample_points, sample_weight = points[present], sample_counts[present]
+        run_labels = []
+        for seed in seeds:
+            model = fit_kmeans_points(sample_points, sample_weight, k, random_state=seed, columns=None)
+            stats = ClusterStats.from_data(sample_points, model.labels_, n_clusters=k, sample_weight=sample_weight)
+            labels = _nearest(points, model.cluster_centers_)  # Label seluruh data asli
+            run_labels.append(labels)
+            rows.append({
+                "K": k,
+                "Bootstrap": int(b),
+                "seed": seed,
+                "SSE": float(model.inertia_),
+                "DBI": stats.davies_bouldin() if (stats.counts > 0).sum() >= 2 else np.nan,
+                "ARI Referensi": adjusted_rand_weighted(reference, labels, counts),
+            })
+
+        # ARI antar seed pada sampel yang sama: rata-rata semua pasangan seed
+        pair_ari = [adjusted_rand_weighted(a, b_, counts) for a, b_ in combinations(run_labels, 2)]
+        for row in rows[-len(seeds):]:
+            row["ARI Antar Seed"] = float(np.mean(pair_ari)) if pair_ari else np.nan
+    return rows
+
+
+def _bootstrap_task(spec, k, reference, bootstrap_ids, seeds, random_state):
+    # Dijalankan di proses pekerja: titik unik dan jumlah baris dibaca dari shared memory
+    with SharedArray.attach(spec) as shared:
+        points = shared.array[:, :-1].copy()
+        counts = shared.array[:, -1].copy()
+    return bootstrap_runs(points, counts, k, reference, bootstrap_ids, seeds, random_state)
+
+
+def _interval(values, confidence):
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return np.nan, np.nan, np.nan
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(values, [tail, 100 - tail])
+    return values.mean(), low, high
+
+
+def summarize_stability(runs, n_points=None, confidence=0.95, min_ari=MIN_ARI):
+    """
+    Ringkasan per K dari hasil `bootstrap_runs`: rata-rata dan selang persentil SSE, DBI, dan ARI,
+    status stabil, serta K yang direkomendasikan (stabil dengan DBI rata-rata terkecil).
+    """
+    rows = []
+    for k, group in runs.groupby("K"):
+        row = {"K": k}
+        for column in ["SSE", "DBI", "ARI Referensi"]:
+            mean, low, high = _interval(group[column].to_numpy(dtype=float), confidence)
+            row[column] = mean
+            row[f"{column} CI Bawah"] = low
+            row[f"{column} CI Atas"] = high
+        row["ARI Antar Seed"] = group["ARI Antar Seed"].mean()
+        row["Jumlah Run"] = int(group["SSE"].notna().sum())
+        rows.append(row)
+
+    summary = pd.DataFrame(rows)
+    # K = jumlah titik unik tidak direkomendasikan: setiap titik menjadi klaster sendiri (DBI 0)
+    eligible = summary["K"] < n_points if n_points is not None else np.ones(len(summary), dtype=bool)
+    summary["Stabil"] = summary["ARI Referensi CI Bawah"] >= min_ari
+    candidates = summary[summary["Stabil"] & eligible & summary["DBI"].notna()]
+    summary["Direkomendasikan"] = False
+    if not candidates.empty:
+        summary.loc[candidates["DBI"].idxmin(), "Direkomendasikan"] = True
+    return summary
+
+
+def bootstrap_stability(features, k_range=range(2, 12), n_bootstrap=1000, seeds=(42, 43, 44), random_state=42,
+                        n_jobs=None, confidence=0.95, min_ari=MIN_ARI, chunk_size=CHUNK_SIZE):
+    """
+    Analisis stabilitas bootstrap untuk setiap K di `k_range` secara paralel.
+    `n_jobs=1` menjalankan semua run di proses ini.
+    Mengembalikan (ringkasan per K, tabel semua run).
+    """
+    start = time.perf_counter()
+    points, counts, _ = collapse_points(features)
+    k_values = [k for k in k_range if k <= len(points)]
+
+    # Model referensi per K pada seluruh data; label run dibandingkan dengan label ini
+    references = {k: fit_kmeans_points(points, counts, k, random_state=random_state, columns=None).labels_
+                  for k in k_values}
+    chunks = [range(i, min(i + chunk_size, n_bootstrap)) for i in range(0, n_bootstrap, chunk_size)]
+    tasks = [(k, references[k], chunk) for k in k_values for chunk in chunks]
+
+    seeds = list(seeds)
+    if n_jobs == 1:
+        results = [bootstrap_runs(points, counts, k, ref, chunk, seeds, random_state) for k, ref, chunk in tasks]
+    else:
+        with SharedArray.from_array(np.column_stack([points, counts])) as shared:
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                futures = [
+                    executor.submit(_bootstrap_task, shared.spec, k, ref, chunk, seeds, random_state)
+                    for k, ref, chunk in tasks
+                ]
+                results = [future.result() for future in futures]
+
+    runs = pd.DataFrame(
+        [row for result in results for row in result],
+        columns=["K", "Bootstrap", "seed", "SSE", "DBI", "ARI Referensi", "ARI Antar Seed"],
+    )
+    summary = summarize_stability(runs, len(points), confidence, min_ari)
+    summary.attrs["Detik"] = time.perf_counter() - start
+    return summary, runs
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from storage import DEFAULT_STORE_PATH, open_store
+
+    parser = argparse.ArgumentParser(description="Analisis stabilitas K dengan bootstrap (SSE, DBI, ARI).")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH, help="Penyimpanan data KPI (.sqlite/.parquet/.xlsx)")
+    parser.add_argument("--k-min", type=int, default=2)
+    parser.add_argument("--k-max", type=int, default=11)
+    parser.add_argument("--n-bootstrap", type=int, default=1000)
+    parser.add_argument("--seeds", type=int, nargs="+", default=[42, 43, 44])
+    parser.add_argument("--random-state", type=int, default=42)
+    parser.add_argument("--n-jobs", type=int, default=None)
+    parser.add_argument("--min-ari", type=float, default=MIN_ARI)
+    parser.add_argument("--output", help="Simpan tabel semua run ke file CSV")
+    args = parser.parse_args()
+
+    data = open_store(args.store).load()
+    features = data[FEATURE_COLUMNS].apply(pd.to_numeric, errors="coerce").dropna()
+    features = features[features["K_num"] != 0]  # Nilai K di luar kategori tidak ikut dilatih
+    summary, runs = bootstrap_stability(
+        features, range(args.k_min, args.k_max + 1), args.n_bootstrap, args.seeds, args.random_state,
+        n_jobs=args.n_jobs, min_ari=args.min_ari,
+    )
+    print(summary.to_string(index=False))
+    print(f"Selesai dalam {summary.attrs['Detik']:.1f} detik")
+    if args.output:
+        runs.to_csv(args.output, index=False)
@@ -0,0 +1,192 @@
+"""
+Penyimpanan data KPI hasil klasterisasi.
+
+Sumber data utama disimpan di SQLite (default) atau Parquet, bukan lagi file Excel. Excel hanya
+dipakai sebagai format impor/ekspor. Backend dipilih dari ekstensi path:
+- `.sqlite` / `.db`  -> SQLite, dengan indeks pada NIP dan Nama Pegawai
+- `.parquet`         -> folder berisi file Parquet per penambahan (membutuhkan pyarrow)
+- `.xlsx`            -> Excel (format lama, setiap penambahan menulis ulang seluruh file)
+
+Migrasi dari file Excel lama:
+    python storage.py migrate Data_Kpi_Hasil_Clustered_Kmeans.xlsx Data_Kpi.sqlite
+"""
+import argparse
+import os
+import sqlite3
+import uuid
+
+import pandas as pd
+
+DEFAULT_STORE_PATH = os.environ.get("SIKERJA_STORE", "Data_Kpi.sqlite")
+LEGACY_EXCEL_PATH = "Data_Kpi_Hasil_Clustered_Kmeans.xlsx"
+
+KPI_COLUMNS = [
+    "NIP", "Nama Pegawai", "Bagian/Fakultas", "P", "Nilai P", "K", "Nilai K",
+    "Total", "Nilai Talenta", "P_num", "K_num", "Cluster", "Nilai Kinerja",
+]
+SQL_TYPES = {
+    "Nilai P": "REAL", "Nilai K": "REAL",
+    "P_num": "INTEGER", "K_num": "INTEGER", "Cluster": "INTEGER",
+}
+
+
+def _conform(rows):
+    """Menyesuaikan kolom DataFrame dengan skema KPI (kolom yang tidak ada diisi kosong)."""
+    rows = pd.DataFrame(rows)
+    for col in KPI_COLUMNS:
+        if col not in rows.columns:
+            rows[col] = None
+    return rows[KPI_COLUMNS]
+
+
+def _drop_empty_columns(data):
+    # Kolom opsional yang belum pernah terisi (misalnya NIP pada data lama) tidak ditampilkan
+    optional = [col for col in ("NIP", "Total", "Nilai Talenta") if col in data.columns and data[col].isna().all()]
+    return data.drop(columns=optional)
+
+
+class KpiStore:
+    """Antarmuka penyimpanan data KPI."""
+    def __init__(self, path):
+        self.path = path
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self):
+        """Memuat seluruh data KPI sebagai DataFrame."""
+        raise NotImplementedError
+
+    def append(self, rows):
+        """Menambahkan baris baru tanpa menulis ulang data yang sudah ada."""
+        raise NotImplementedError
+
+    def import_excel(self, excel_path):
+        """Menambahkan seluruh isi file Excel ke penyimpanan."""
+        self.append(pd.read_excel(excel_path))
+
+    def export_excel(self, excel_path):
+        """Menyimpan seluruh data ke file Excel."""
+        self.load().to_excel(excel_path, index=False)
+
+
+class SqliteKpiStore(KpiStore):
+    """Penyimpanan SQLite dengan indeks pada NIP dan Nama Pegawai."""
+    table = "kpi"
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path)
+        columns = ", ".join(f'"{col}" {SQL_TYPES.get(col, "TEXT")}' for col in KPI_COLUMNS)
+        connection.execute(f'CREATE TABLE IF NOT EXISTS {self.table} (id INTEGER PRIMARY KEY AUTOINCREMENT, {columns})')
+        connection.execute(f'CREATE INDEX IF NOT EXISTS idx_{self.table}_nip ON {self.table} ("NIP")')
+        connection.execute(f'CREATE INDEX IF NOT EXISTS idx_{self.table}_nama ON {self.table} ("Nama Pegawai" COLLATE NOCASE)')
+        return connection
+
+    def load(self):
+        quoted = ", ".join(f'"{col}"' for col in KPI_COLUMNS)
+        with self._connect() as connection:
+            data = pd.read_sql_query(f"SELECT {quoted} FROM {self.table} ORDER BY id", connection)
+        return _drop_empty_columns(data)
+
+    def append(self, rows):
+        rows = _conform(rows).astype(object).where(lambda df: df.notna(), None)
+        placeholders = ", ".join("?" for _ in KPI_COLUMNS)
+        quoted = ", ".join(f'"{col}"' for col in KPI_COLUMNS)
+        with self._connect() as connection:
+            connection.executemany(
+                f"INSERT INTO {self.table} ({quoted}) VALUES ({placeholders})",
+                rows.itertuples(index=False, name=None),
+            )
+
+    def find_by_nip(self, nip):
+        """Mencari data berdasarkan NIP menggunakan indeks."""
+        quoted = ", ".join(f'"{col}"' for col in KPI_COLUMNS)
+        with self._connect() as connection:
+            return pd.read_sql_query(
+                f'SELECT {quoted} FROM {self.table} WHERE "NIP" = ? ORDER BY id', connection, params=(str(nip),)
+            )
+
+
+class ParquetKpiStore(KpiStore):
+    """Folder Parquet; setiap penambahan ditulis sebagai file bagian (part) baru."""
+    def exists(self):
+        return os.path.isdir(self.path) and any(name.endswith(".parquet") for name in os.listdir(self.path))
+
+    def load(self):
+        if not self.exists():
+            return _drop_empty_columns(_conform(pd.DataFrame()))
+        return _drop_empty_columns(_conform(pd.read_parquet(self.path)))
+
+    def append(self, rows):
+        os.makedirs(self.path, exist_ok=True)
+        rows = _conform(rows)
+        for col in KPI_COLUMNS:
+            if col not in SQL_TYPES:
+                rows[col] = rows[col].astype("string")
+        part = f"part-{pd.Timestamp.now():%Y%m%d%H%M%S%f}-{uuid.uuid4().hex[:8]}.parquet"
+        rows.to_parquet(os.path.join(self.path, part), index=False)
+
+    def compact(self):
+        """Menggabungkan semua file bagian menjadi satu file."""
+        data = _conform(pd.read_parquet(self.path))
+        old_parts = [name for name in os.listdir(self.path) if name.endswith(".parquet")]
+        self.append(data)
+        for name in old_parts:
+            os.remove(os.path.join(self.path, name))
+
+
+class ExcelKpiStore(KpiStore):
+    """Format lama: satu file Excel yang ditulis ulang setiap kali data ditambahkan."""
+    def load(self):
+        return pd.read_excel(self.path)
+
+    def append(self, rows):
+        data = self.load() if self.exists() else pd.DataFrame()
+        pd.concat([data, pd.DataFrame(rows)], ignore_index=True).to_excel(self.path, index=False)
+
+
+def open_store(path=DEFAULT_STORE_PATH):
+    """Membuka penyimpanan sesuai ekstensi path."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".sqlite", ".db"):
+        return SqliteKpiStore(path)
+    if extension == ".parquet":
+        return ParquetKpiStore(path)
+    if extension == ".xlsx":
+        return ExcelKpiStore(path)
+    raise ValueError(f"Backend penyimpanan untuk '{path}' tidak dikenali.")
+
+
+def migrate_excel(excel_path, store):
+    """Memindahkan data dari file Excel lama ke penyimpanan baru (hanya jika penyimpanan masih kosong)."""
+    if store.exists() and len(store.load()) > 0:
+        return False
+    store.import_excel(excel_path)
+    return True
+
+
+def open_default_store():
+    """Membuka penyimpanan default; jika belum ada, data dimigrasikan dari file Excel lama."""
+    store = open_store(DEFAULT_STORE_PATH)
+    if not store.exists() and os.path.exists(LEGACY_EXCEL_PATH):
+        migrate_excel(LEGACY_EXCEL_PATH, store)
+    return store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrasi dan ekspor data KPI.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    migrate_parser = subparsers.add_parser("migrate", help="Memindahkan data dari Excel ke penyimpanan baru")
+    migrate_parser.add_argument("excel_path")
+    migrate_parser.add_argument("store_path", nargs="?", default=DEFAULT_STORE_PATH)
+    export_parser = subparsers.add_parser("export", help="Mengekspor data ke file Excel")
+    export_parser.add_argument("excel_path")
+    export_parser.add_argument("store_path", nargs="?", default=DEFAULT_STORE_PATH)
+    args = parser.parse_args()
+
+    target = open_store(args.store_path)
+    if args.command == "migrate":
+        print("Migrasi selesai." if migrate_excel(args.excel_path, target) else "Penyimpanan sudah berisi data.")
+    else:
+        target.export_excel(args.excel_path)
+        print(f"Data telah diekspor ke {args.excel_path}.")
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modul aplikasi diimpor langsung dari folder Deploy (seperti saat `streamlit run DEPLOYFINAL.py`)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
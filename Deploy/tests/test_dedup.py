@@ -0,0 +1,28 @@
+import io
+
+import pandas as pd
+
+from banding import add_bands
+from dedup import canonical_nip, row_fingerprints
+from ingest import read_csv_chunks
+from schema import apply_schema
+
+CSV = (
+    "NIP,Nama Pegawai,Bagian/Fakultas,Nilai P,Nilai K\n"
+    "00123,Ani,Fakultas Teknik,85,3\n"
+    "456.0,Budi,Fakultas Hukum,90.5,2\n"
+)
+
+
+def test_fingerprint_sama_untuk_jalur_streaming_dan_memori():
+    streaming = pd.concat(list(read_csv_chunks(io.StringIO(CSV), chunksize=1)), ignore_index=True)
+    in_memory = apply_schema(add_bands(pd.read_csv(io.StringIO(CSV))))
+    assert str(in_memory["NIP"].dtype) == "Int64"
+    assert str(streaming["NIP"].dtype) == "string"
+    assert (row_fingerprints(add_bands(streaming), "2023") == row_fingerprints(in_memory, "2023")).all()
+
+
+def test_canonical_nip():
+    values = pd.Series(["00123", " 123.0 ", "123", "000", "A-01", None], dtype="string")
+    assert canonical_nip(values).tolist() == ["123", "123", "123", "0", "A-01", ""]
+    assert canonical_nip(pd.Series([123, None], dtype="Int64")).tolist() == ["123", ""]
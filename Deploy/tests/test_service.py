@@ -0,0 +1,16 @@
+import pytest
+
+from service import prepare_record
+
+
+def test_kode_grid_diterima():
+    record = prepare_record({"P_num": 2.0, "K_num": 4})
+    assert (record["P"], record["P_num"], record["K"], record["K_num"]) == ("P2", 2, "K4", 4)
+
+
+@pytest.mark.parametrize("p_num, k_num", [
+    (7, 1), (2.5, 1), (-1, 1), (float("inf"), 1), (float("nan"), 1), (0, 1), (1, 5), (1, 0),
+])
+def test_kode_di_luar_grid_ditolak(p_num, k_num):
+    with pytest.raises(ValueError):
+        prepare_record({"P_num": p_num, "K_num": k_num})
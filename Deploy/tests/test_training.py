@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from training import warm_sweep_k
+
+
+def _synthetic(seed, n_rows=200_000):
+    # Fitur diskrit seperti data KPI: P_num 1-5, K_num 1-4 dengan sebaran acak
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "P_num": rng.choice(np.arange(1, 6), n_rows, p=rng.dirichlet(np.ones(5))),
+        "K_num": rng.choice(np.arange(1, 5), n_rows, p=rng.dirichlet(np.ones(4))),
+    })
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_knee_sweep_terpotong_sama_dengan_sweep_penuh(seed):
+    features = _synthetic(seed)
+    curve, summary = warm_sweep_k(features, range(2, 12), patience=2)
+    _, full = warm_sweep_k(features, range(2, 12), patience=None)
+    assert summary["K Knee"] == full["K Knee"]
+    assert summary["Knee Terkonfirmasi"]
+    assert curve["K"].iloc[-1] == 11  # Titik akhir k_range selalu dilatih
+    assert summary["DBI Lengkap"] == (summary["Fit Dihemat"] == 0)
@@ -0,0 +1,374 @@
+"""
+Utilitas pelatihan K-Means untuk notebook model (Elbow, DBI, dan model final).
+
+Fitur P_num/K_num hanya memiliki paling banyak 20 titik berbeda, sehingga pelatihan dapat
+dilakukan pada titik unik dengan bobot jumlah baris (`sample_weight`) lalu label dikembalikan
+ke setiap baris. Biaya pelatihan tidak lagi bergantung pada jumlah pegawai.
+
+Pemilihan K otomatis (knee SSE + DBI) untuk pelatihan ulang terjadwal, dari penyimpanan data KPI:
+    python training.py --k-max 11 --compare-exhaustive
+"""
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.cluster import KMeans
+from sklearn.metrics import davies_bouldin_score
+from sklearn.metrics.pairwise import euclidean_distances
+from sklearn.utils import check_random_state
+
+FEATURE_COLUMNS = ["P_num", "K_num"]
+
+
+def collapse_points(features):
+    """
+    Meringkas fitur menjadi titik unik.
+    Mengembalikan (titik unik, bobot = jumlah baris per titik, indeks titik untuk setiap baris).
+    """
+    values = np.asarray(features, dtype=float)
+    if values.ndim == 1:
+        values = values[:, np.newaxis]
+
+    # groupby.ngroup jauh lebih cepat daripada np.unique(axis=0) untuk ratusan ribu baris
+    frame = pd.DataFrame(values)
+    inverse = frame.groupby(list(frame.columns), sort=True, dropna=False).ngroup().to_numpy()
+    counts = np.bincount(inverse).astype(float)
+    points = np.empty((len(counts), values.shape[1]))
+    points[inverse] = values
+    return points, counts, inverse
+
+
+def _kmeans_plusplus_rows(points, counts, inverse, n_clusters, random_state, n_local_trials=None):
+    """
+    Inisialisasi k-means++ yang menghasilkan pusat awal sama persis dengan KMeans pada data per baris.
+
+    Undian acak tetap dilakukan terhadap urutan baris asli (seperti KMeans biasa), tetapi semua
+    perhitungan jarak hanya dilakukan pada titik unik.
+    """
+    n_rows = inverse.shape[0]
+    if n_local_trials is None:
+        n_local_trials = 2 + int(np.log(n_clusters))
+
+    # KMeans memusatkan data pada rata-rata baris sebelum inisialisasi
+    row_mean = (points * counts[:, np.newaxis]).sum(axis=0) / counts.sum()
+    centered = points - row_mean
+    squared_norms = (centered ** 2).sum(axis=1)
+
+    row_id = random_state.choice(n_rows, p=np.ones(n_rows) / n_rows)
+    chosen = [inverse[row_id]]
+
+    closest_dist_sq = euclidean_distances(
+        centered[[chosen[0]]], centered, Y_norm_squared=squared_norms, squared=True
+    )[0]
+    current_pot = closest_dist_sq @ counts
+
+    for _ in range(1, n_clusters):
+        rand_vals = random_state.uniform(size=n_local_trials) * current_pot
+        row_ids = np.searchsorted(np.cumsum(closest_dist_sq[inverse], dtype=np.float64), rand_vals)
+        np.clip(row_ids, None, n_rows - 1, out=row_ids)
+        candidate_ids = inverse[row_ids]
+
+        distance_to_candidates = euclidean_distances(
+            centered[candidate_ids], centered, Y_norm_squared=squared_norms, squared=True
+        )
+        np.minimum(closest_dist_sq, distance_to_candidates, out=distance_to_candidates)
+        candidates_pot = distance_to_candidates @ counts
+
+        best_candidate = np.argmin(candidates_pot)
+        current_pot = candidates_pot[best_candidate]
+        closest_dist_sq = distance_to_candidates[best_candidate]
+        chosen.append(candidate_ids[best_candidate])
+
+    return points[chosen]
+
+
+def _has_assignment_ties(points, counts, init, max_iter, rtol=1e-9):
+    """
+    Menjalankan iterasi Lloyd pada titik unik dan memeriksa apakah ada titik yang berjarak sama
+    ke dua centroid. Pada kondisi seperti itu KMeans per baris menentukan label berdasarkan
+    pembulatan floating point, sehingga hasil berbobot tidak dijamin identik.
+    """
+    centers = init.copy()
+    labels_old = None
+    for _ in range(max_iter + 1):
+        distances = ((points[:, np.newaxis, :] - centers[np.newaxis, :, :]) ** 2).sum(axis=2)
+        nearest = np.sort(distances, axis=1)[:, :2]
+        if np.any(nearest[:, 1] - nearest[:, 0] <= rtol * np.maximum(nearest[:, 1], 1.0)):
+            return True
+        labels = distances.argmin(axis=1)
+        if labels_old is not None and np.array_equal(labels, labels_old):
+            return False
+        labels_old = labels
+        weight = np.bincount(labels, weights=counts, minlength=len(centers))
+        for j in np.flatnonzero(weight > 0):
+            centers[j] = (points[labels == j] * counts[labels == j, np.newaxis]).sum(axis=0) / weight[j]
+    return False
+
+
+def fit_kmeans_weighted(features, n_clusters, random_state=42, tol=1e-4, max_iter=300, exact=True):
+    """
+    Melatih K-Means pada titik unik dengan bobot jumlah baris.
+
+    Hasilnya sama dengan `KMeans(n_clusters, random_state=random_state, n_init=1).fit(features)`:
+    inisialisasi, label, centroid, dan inertia yang sama. `n_init=1` ditetapkan eksplisit di kedua
+    jalur, karena nilai bawaannya berbeda antar versi scikit-learn (10 sebelum 1.4). Atribut `labels_` pada model yang
+    dikembalikan sudah diperluas kembali ke setiap baris `features`.
+
+    Jika ada titik yang berjarak sama ke dua centroid, hasil KMeans per baris ditentukan oleh
+    pembulatan floating point; untuk kasus tersebut model dilatih ulang pada semua baris.
+    Gunakan `exact=False` untuk selalu melatih pada titik unik (objektif sama, tetapi label
+    pada titik yang berjarak sama ke dua centroid dapat berbeda).
+    """
+    columns = list(features.columns) if isinstance(features, pd.DataFrame) else None
+    points, counts, inverse = collapse_points(features)
+
+    def fit_rows():
+        return KMeans(
+            n_clusters=n_clusters, n_init=1, random_state=random_state, tol=tol, max_iter=max_iter
+        ).fit(features)
+
+    # Jumlah titik unik lebih sedikit dari jumlah klaster: latih seperti biasa pada semua baris
+    if len(points) < n_clusters:
+        return fit_rows()
+
+    init = _kmeans_plusplus_rows(points, counts, inverse, n_clusters, check_random_state(random_state))
+    if exact and _has_assignment_ties(points, counts, init, max_iter):
+        return fit_rows()
+
+    # Toleransi KMeans relatif terhadap varians data; samakan dengan varians per baris
+    row_mean = (points * counts[:, np.newaxis]).sum(axis=0) / counts.sum()
+    row_variance = (((points - row_mean) ** 2) * counts[:, np.newaxis]).sum(axis=0).mean() / counts.sum()
+    point_variance = points.var(axis=0).mean()
+    relative_tol = tol * row_variance / point_variance if point_variance > 0 else tol
+
+    model = KMeans(
+        n_clusters=n_clusters, init=init, n_init=1, tol=relative_tol,
+        max_iter=max_iter, random_state=random_state,
+    )
+    model.fit(pd.DataFrame(points, columns=columns) if columns else points, sample_weight=counts)
+
+    model.labels_ = model.labels_[inverse]
+    return model
+
+
+def fit_kmeans_points(points, counts, n_clusters, random_state=42, columns=FEATURE_COLUMNS):
+    """
+    Melatih K-Means full-batch dari histogram titik unik (titik, jumlah baris per titik), misalnya
+    yang dikumpulkan saat membaca data per chunk. Objektifnya sama dengan KMeans pada semua baris;
+    `labels_` berisi label setiap titik unik.
+    """
+    points = pd.DataFrame(np.asarray(points, dtype=float), columns=columns)
+    return KMeans(n_clusters=n_clusters, random_state=random_state).fit(points, sample_weight=counts)
+
+
+# --- Sweep Jumlah Klaster (K) ---
+def evaluate_k(features, k, random_state=42, silhouette_sample_size=None):
+    """Melatih K-Means satu kali untuk K tertentu dan menghitung SSE, DBI, serta Silhouette dari hasil tersebut."""
+    model = fit_kmeans_weighted(features, n_clusters=k, random_state=random_state)
+    return score_kmeans(features, model, random_state, silhouette_sample_size)
+
+
+def score_kmeans(features, model, random_state=42, silhouette_sample_size=None):
+    """
+    SSE, DBI, dan Silhouette dari model K-Means yang sudah dilatih pada `features` (tanpa melatih ulang).
+    Silhouette dihitung tepat dari titik unik berbobot; `silhouette_sample_size` memakai perkiraan dari
+    sampel baris (untuk fitur kontinu).
+    """
+    from silhouette import silhouette_estimate, silhouette_exact
+
+    labels = model.labels_
+    n_labels = len(np.unique(labels))
+    valid = 1 < n_labels < len(labels)
+    return {
+        "K": model.n_clusters,
+        "seed": random_state,
+        "SSE": model.inertia_,
+        "DBI": davies_bouldin_score(features, labels) if valid else np.nan,
+        "Silhouette": (
+            silhouette_exact(features, labels)[0] if silhouette_sample_size is None
+            else silhouette_estimate(features, labels, silhouette_sample_size, random_state=random_state)[0]["Silhouette"]
+        ) if valid else np.nan,
+        "n_iter": model.n_iter_,
+    }
+
+
+def sweep_k(features, k_range=range(2, 12), seeds=(42,), n_jobs=-1, silhouette_sample_size=None):
+    """
+    Mengevaluasi setiap K (dan setiap seed) tepat satu kali secara paralel.
+    Mengembalikan tabel dengan satu baris per (K, seed): K, seed, SSE, DBI, Silhouette, n_iter.
+    """
+    features = np.asarray(features, dtype=float)
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(evaluate_k)(features, k, seed, silhouette_sample_size)
+        for k in k_range for seed in seeds
+    )
+    return pd.DataFrame(results).sort_values(["K", "seed"]).reset_index(drop=True)
+
+
+def summarize_sweep(results):
+    """Rata-rata dan simpangan baku SSE, DBI, dan Silhouette per K dari hasil `sweep_k`."""
+    return results.groupby("K")[["SSE", "DBI", "Silhouette"]].agg(["mean", "std"])
+
+
+# --- Sweep K dengan Warm Start dan Deteksi Knee ---
+def find_knee(k_values, sse):
+    """
+    Knee kurva SSE (menurun dan cembung) dengan metode Kneedle: setelah K dan SSE dinormalisasi
+    ke [0, 1], knee adalah titik dengan jarak terbesar di bawah garis yang menghubungkan titik
+    pertama dan terakhir. Mengembalikan None jika titik kurang dari 3 atau kurva tidak melengkung.
+    """
+    k = np.asarray(k_values, dtype=float)
+    sse = np.asarray(sse, dtype=float)
+    if len(k) < 3 or sse.max() == sse.min():
+        return None
+    x = (k - k[0]) / (k[-1] - k[0])
+    y = (sse - sse.min()) / (sse.max() - sse.min())
+    distance = (y[0] + (y[-1] - y[0]) * x) - y
+    best = int(np.argmax(distance[1:-1])) + 1
+    return int(k_values[best]) if distance[best] > 0 else None
+
+
+def split_centers(points, counts, centers, labels):
+    """
+    Pusat awal untuk K+1 klaster dari solusi K klaster: klaster dengan SSE terbesar dibelah dua
+    sepanjang sumbu utamanya (pusat -/+ simpangan baku pada sumbu tersebut), pusat lain tetap.
+    """
+    residual = counts * ((points - centers[labels]) ** 2).sum(axis=1)
+    j = int(np.argmax(np.bincount(labels, weights=residual, minlength=len(centers))))
+    members = labels == j
+    weight = counts[members]
+    diff = points[members] - centers[j]
+    covariance = (diff * weight[:, np.newaxis]).T @ diff / weight.sum()
+    eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+    offset = eigenvectors[:, -1] * np.sqrt(max(eigenvalues[-1], 0.0))
+
+    split = centers.copy()
+    split[j] = centers[j] - offset
+    return np.vstack([split, centers[j] + offset])
+
+
+def _curve_row(points, counts, model, k, seconds, warm):
+    from evaluation import ClusterStats  # evaluation mengimpor modul ini
+
+    stats = ClusterStats.from_data(points, model.labels_, n_clusters=k, sample_weight=counts)
+    return {
+        "K": k,
+        "SSE": float(model.inertia_),
+        "DBI": stats.davies_bouldin() if (stats.counts > 0).sum() >= 2 else np.nan,
+        "n_iter": model.n_iter_,
+        "Detik": seconds,
+        "Warm Start": warm,
+    }
+
+
+def _dbi_minimum(curve, n_points):
+    # K = jumlah titik unik tidak dihitung: setiap titik menjadi klaster sendiri sehingga DBI selalu 0
+    candidates = curve[(curve["K"] < n_points) & curve["DBI"].notna()]
+    return int(candidates.loc[candidates["DBI"].idxmin(), "K"]) if len(candidates) else None
+
+
+def warm_sweep_k(features, k_range=range(2, 12), random_state=42, patience=2, compare_exhaustive=False):
+    """
+    Sweep K berurutan dengan warm start: fit K+1 dimulai dari centroid solusi K dengan klaster
+    ber-SSE terbesar dibelah dua (`split_centers`).
+
+    Knee Kneedle (`find_knee`) bergantung pada titik akhir kurva, sehingga knee dari potongan awal
+    kurva condong ke K kecil. Karena itu K terbesar di `k_range` dilatih lebih dulu dan knee setiap
+    langkah dihitung pada K yang sudah dilatih ditambah titik akhir tersebut. Sweep berhenti jika
+    sudah ada `patience` K setelah knee (jarak ke garis Kneedle menurun setelah knee; untuk kurva SSE
+    yang cembung jarak ini unimodal, sehingga K yang belum dilatih tidak dapat menjadi knee).
+    `patience=None` melatih semua K.
+
+    Knee dicek silang dengan K ber-DBI minimum; DBI hanya tersedia untuk K yang dilatih (baris
+    `curve`), sehingga "K DBI Minimum" adalah minimum di antara K tersebut ("DBI Lengkap" False
+    jika ada K yang dilewati).
+
+    Jika `compare_exhaustive=True`, semua K juga dilatih dari awal (`fit_kmeans_weighted`, seperti
+    loop biasa) untuk membandingkan waktu dan knee.
+    Mengembalikan (tabel per K: K, SSE, DBI, n_iter, Detik, Warm Start; ringkasan pemilihan K).
+    """
+    points, counts, _ = collapse_points(features)
+    k_values = [k for k in k_range if k <= len(points)]  # Jumlah klaster tidak boleh melebihi jumlah titik unik
+    frame = pd.DataFrame(points, columns=FEATURE_COLUMNS)
+
+    start = time.perf_counter()
+    end_row = None
+    if len(k_values) >= 3:
+        fit_start = time.perf_counter()
+        model = fit_kmeans_points(points, counts, k_values[-1], random_state)
+        end_row = _curve_row(points, counts, model, k_values[-1], time.perf_counter() - fit_start, False)
+
+    rows = []
+    model = None
+    knee = None
+    for k in k_values if end_row is None else k_values[:-1]:
+        fit_start = time.perf_counter()
+        if model is None or k != rows[-1]["K"] + 1:
+            model = fit_kmeans_points(points, counts, k, random_state)
+            warm = False
+        else:
+            init = split_centers(points, counts, model.cluster_centers_, model.labels_)
+            model = KMeans(n_clusters=k, init=init, n_init=1, random_state=random_state)
+            model.fit(frame, sample_weight=counts)
+            warm = True
+        rows.append(_curve_row(points, counts, model, k, time.perf_counter() - fit_start, warm))
+
+        fitted = rows + ([end_row] if end_row is not None else [])
+        knee = find_knee([row["K"] for row in fitted], [row["SSE"] for row in fitted])
+        if patience is not None and knee is not None and k >= knee + patience:
+            break
+    if end_row is not None:
+        rows.append(end_row)
+    seconds = time.perf_counter() - start
+
+    curve = pd.DataFrame(rows, columns=["K", "SSE", "DBI", "n_iter", "Detik", "Warm Start"])
+    dbi_k = _dbi_minimum(curve, len(points))
+    summary = {
+        "K Knee": knee,
+        "K DBI Minimum": dbi_k,
+        "DBI Sesuai": knee is not None and knee == dbi_k,
+        "DBI Lengkap": len(rows) == len(k_values),
+        "K Terpilih": knee if knee is not None else dbi_k,
+        "Knee Terkonfirmasi": knee is not None and (len(rows) == len(k_values) or rows[-2]["K"] >= knee + patience),
+        "Jumlah Fit": len(rows),
+        "Jumlah Fit Exhaustive": len(k_values),
+        "Fit Dihemat": len(k_values) - len(rows),
+        "Detik": seconds,
+    }
+
+    if compare_exhaustive:
+        # Loop biasa: setiap K dilatih dari awal dengan random_state yang sama
+        start = time.perf_counter()
+        exhaustive_sse = [
+            fit_kmeans_weighted(features, n_clusters=k, random_state=random_state).inertia_ for k in k_values
+        ]
+        summary["Detik Exhaustive"] = time.perf_counter() - start
+        summary["K Knee Exhaustive"] = find_knee(k_values, exhaustive_sse)
+        summary["Percepatan"] = summary["Detik Exhaustive"] / seconds if seconds > 0 else np.nan
+    return curve, summary
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from storage import DEFAULT_STORE_PATH, open_store
+
+    parser = argparse.ArgumentParser(description="Pemilihan K otomatis (knee SSE dicek silang dengan DBI).")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH, help="Penyimpanan data KPI (.sqlite/.parquet/.xlsx)")
+    parser.add_argument("--k-min", type=int, default=2)
+    parser.add_argument("--k-max", type=int, default=11)
+    parser.add_argument("--patience", type=int, default=2)
+    parser.add_argument("--random-state", type=int, default=42)
+    parser.add_argument("--compare-exhaustive", action="store_true", help="Bandingkan dengan loop yang melatih setiap K dari awal")
+    args = parser.parse_args()
+
+    data = open_store(args.store).load()
+    features = data[FEATURE_COLUMNS].apply(pd.to_numeric, errors="coerce").dropna()
+    features = features[features["K_num"] != 0]  # Nilai K di luar kategori tidak ikut dilatih
+    curve, summary = warm_sweep_k(
+        features, range(args.k_min, args.k_max + 1), args.random_state, args.patience, args.compare_exhaustive
+    )
+    print(curve.to_string(index=False))
+    print(json.dumps(summary, indent=2, default=float))
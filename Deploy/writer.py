@@ -0,0 +1,275 @@
+"""
+Penulis tunggal data KPI untuk menu "Input Data Baru".
+
+Setiap pengiriman dari sesi mana pun hanya ditambahkan sebagai satu baris JSON ke write-ahead log
+(WAL) append-only di bawah file lock, lalu dikonfirmasi: biaya per pengiriman O(1) dan data tidak
+hilang walaupun aplikasi berhenti sebelum data ditulis ke penyimpanan.
+
+Thread latar belakang memindahkan isi WAL ke penyimpanan utama (`KpiStore.append`) secara berkala
+(setiap `flush_interval` detik atau setelah `max_batch` pengiriman) dalam satu penulisan, lalu
+mengosongkan WAL. Sisa WAL dari proses sebelumnya diputar ulang saat penulis dibuat. Jika proses
+berhenti tepat di antara penulisan ke penyimpanan dan pengosongan WAL, batch tersebut dapat
+tertulis dua kali, tetapi tidak pernah hilang.
+
+Pembaca memakai `snapshot()`: data penyimpanan + semua pengiriman yang sudah dikonfirmasi dalam
+proses ini (dengan skema tipe ringkas `schema.KPI_SCHEMA`), yang tidak berubah setelah dikembalikan.
+Snapshot berupa `KpiView`: frame dasar ditambah ekor kecil pengiriman terbaru. Ekor baru digabung
+ke frame dasar saat thread latar belakang menulis ke penyimpanan, sehingga satu pengiriman tidak
+menyalin seluruh data; jumlah baris, kolom, dan pengambilan baris (`iloc`) tidak menyalin frame dasar.
+"""
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from schema import KPI_SCHEMA, apply_schema, concat_frames
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+FLUSH_INTERVAL = 2.0
+MAX_BATCH = 500
+
+
+class FileLock:
+    """Kunci eksklusif antarproses (fcntl/msvcrt) sekaligus antarthread."""
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._handle = None
+        self._depth = 0
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            handle = open(self.path, "a+b")
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+            self._handle = handle
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        self._depth -= 1
+        if self._depth == 0:
+            if fcntl is not None:
+                fcntl.flock(self._handle.fileno(), fcntl.LOCK_UN)
+            else:
+                self._handle.seek(0)
+                msvcrt.locking(self._handle.fileno(), msvcrt.LK_UNLCK, 1)
+            self._handle.close()
+            self._handle = None
+        self._thread_lock.release()
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+class _ViewIndexer:
+    def __init__(self, view):
+        self._view = view
+
+    def __getitem__(self, key):
+        return self._view.take(np.arange(len(self._view))[key])
+
+
+class KpiView:
+    """
+    Snapshot baca-saja: frame dasar (sudah digabung) + ekor pengiriman yang belum digabung.
+    `len`, `columns`, `iloc[...]`, dan `view[kolom]` tidak menyalin frame dasar; operasi DataFrame
+    lain memakai `frame()` (digabung sekali per view).
+    """
+    def __init__(self, base, tail, schema, version=0, base_version=0):
+        self.base = base
+        self.tail = tail
+        self.schema = schema
+        self.version = version
+        self.base_version = base_version
+        self._frame = None
+
+    def __len__(self):
+        return len(self.base) + len(self.tail)
+
+    @property
+    def columns(self):
+        return self.base.columns.append(self.tail.columns.difference(self.base.columns, sort=False))
+
+    @property
+    def iloc(self):
+        return _ViewIndexer(self)
+
+    def take(self, positions):
+        """Baris pada `positions` (urutan dipertahankan), dengan label indeks = posisi baris."""
+        positions = np.asarray(positions, dtype=np.int64)
+        if self.tail.empty:
+            return self.base.iloc[positions]
+        in_base = positions < len(self.base)
+        rows = concat_frames(
+            [self.base.iloc[positions[in_base]], self.tail.iloc[positions[~in_base] - len(self.base)]], self.schema
+        )
+        order = np.concatenate([np.flatnonzero(in_base), np.flatnonzero(~in_base)])
+        rows = rows.iloc[np.argsort(order, kind="stable")]
+        rows.index = positions
+        return rows
+
+    def __getitem__(self, key):
+        if self.tail.empty:
+            return self.base[key]
+        keys = [key] if isinstance(key, str) else list(key)
+        combined = concat_frames([self.base[keys], self.tail.reindex(columns=keys)], self.schema)
+        return combined[key] if isinstance(key, str) else combined
+
+    def frame(self):
+        """Seluruh data sebagai satu DataFrame (O(jumlah baris), sekali per view)."""
+        if self._frame is None:
+            self._frame = self.base if self.tail.empty else concat_frames([self.base, self.tail], self.schema)
+        return self._frame
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.frame(), name)
+
+
+class KpiWriter:
+    """Penulis tunggal: WAL append-only + penulisan berkelompok ke `store` oleh thread latar belakang."""
+    def __init__(self, store, wal_path=None, flush_interval=FLUSH_INTERVAL, max_batch=MAX_BATCH, schema=KPI_SCHEMA):
+        self.store = store
+        self.schema = schema
+        self.wal_path = wal_path or f"{os.path.splitext(store.path)[0]}.wal"
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.lock = FileLock(self.wal_path + ".lock")
+
+        self.version = 0
+        self.n_submitted = 0
+        self.n_flushed = 0
+        self._pending = 0
+        self._state_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+
+        # Sisa WAL dari proses sebelumnya ditulis ke penyimpanan terlebih dahulu
+        self._tail = []
+        self.n_recovered = self.flush()
+        self.n_flushed = 0
+        self.base_version = 0
+        self._base = apply_schema(self.store.load(), schema)
+        self._view = None
+
+        self._worker = threading.Thread(target=self._run, name="kpi-writer", daemon=True)
+        self._worker.start()
+
+    # --- Pengiriman ---
+    def submit(self, row):
+        """Mencatat satu baris ke WAL (fsync) dan mengembalikan setelah data aman di disk."""
+        row = dict(row)
+        line = json.dumps(row, default=_json_default, ensure_ascii=False) + "\n"
+        with self.lock:
+            with open(self.wal_path, "ab") as wal:
+                wal.write(line.encode("utf-8"))
+                wal.flush()
+                os.fsync(wal.fileno())
+            with self._state_lock:
+                self._tail.append(row)
+                self._view = None
+                self.version += 1
+                self.n_submitted += 1
+                self._pending += 1
+                pending = self._pending
+        if pending >= self.max_batch:
+            self._wake.set()
+        return self.version
+
+    # --- Pembacaan ---
+    def snapshot(self):
+        """
+        Data penyimpanan ditambah semua pengiriman yang sudah dikonfirmasi, sebagai `KpiView`
+        (jangan diubah in-place). Biaya per versi hanya sebesar ekor yang belum digabung.
+        """
+        with self._state_lock:
+            if self._view is None:
+                tail = apply_schema(pd.DataFrame(self._tail), self.schema) if self._tail else pd.DataFrame()
+                self._view = KpiView(self._base, tail, self.schema, self.version, self.base_version)
+            return self._view
+
+    def _fold(self, n_rows):
+        """Menggabungkan `n_rows` baris pertama ekor ke frame dasar (dijalankan setelah penulisan ke penyimpanan)."""
+        if n_rows == 0:
+            return
+        with self._state_lock:
+            base, rows = self._base, self._tail[:n_rows]
+        folded = concat_frames([base, pd.DataFrame(rows)], self.schema)
+        with self._state_lock:
+            self._base = folded
+            del self._tail[:n_rows]
+            self.base_version += 1
+            self._view = None
+
+    # --- Penulisan ke penyimpanan ---
+    def _read_wal(self):
+        if not os.path.exists(self.wal_path):
+            return []
+        rows = []
+        with open(self.wal_path, "rb") as wal:
+            for line in wal:
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    break  # Baris terakhir terpotong: belum pernah dikonfirmasi ke pengguna
+        return rows
+
+    def flush(self):
+        """Menulis semua isi WAL ke penyimpanan dalam satu penulisan, lalu mengosongkan WAL."""
+        with self.lock:
+            rows = self._read_wal()
+            if rows:
+                self.store.append(rows)
+            if os.path.exists(self.wal_path):
+                open(self.wal_path, "wb").close()
+            with self._state_lock:
+                self.n_flushed += len(rows)
+                self._pending = 0
+                n_tail = len(self._tail)
+        # Ekor yang sudah ada di penyimpanan digabung ke frame dasar di luar file lock
+        if hasattr(self, "_base"):
+            self._fold(n_tail)
+        return len(rows)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                time.sleep(self.flush_interval)  # Data tetap aman di WAL; dicoba lagi nanti
+
+    def close(self):
+        """Menghentikan thread latar belakang setelah penulisan terakhir."""
+        self._stopped.set()
+        self._wake.set()
+        self._worker.join()
+        self.flush()
+
+    def metrics(self):
+        with self._state_lock:
+            return {
+                "version": self.version,
+                "submitted": self.n_submitted,
+                "flushed": self.n_flushed,
+                "pending": self._pending,
+                "recovered": self.n_recovered,
+            }